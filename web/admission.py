@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# ============================================
+# ADMISSION CONTROL
+# ============================================
+# On Christmas Eve the API sees many times its usual traffic. Two guards keep
+# latency bounded for the clients that behave:
+#
+# * Per-client token buckets, keyed on nginx's X-Real-IP. A client gets
+#   RATE_LIMIT requests a second, in bursts of up to RATE_BURST; past that it
+#   gets an immediate 429 with Retry-After.
+# * A cap on API requests in flight. Past it (or while connections are queued
+#   for a worker) the server builds nothing new: it answers with the last
+#   good snapshot, marked stale, or 503 when it has none.
+#
+# Both are per process; pre-forked workers each enforce their own share.
+
+RATE_LIMIT = float(os.environ.get('SANTA_RATE_LIMIT', 20))    # Per client per second; 0 = off
+RATE_BURST = float(os.environ.get('SANTA_RATE_BURST', 40))
+MAX_CLIENTS = 65536     # Buckets kept; the least recently seen client is dropped first
+
+# Peers whose X-Real-IP we believe (nginx in the same container)
+TRUSTED_PROXIES = frozenset({"127.0.0.1", "::1", "::ffff:127.0.0.1"})
+
+
+def client_key(peer, real_ip):
+    """Who a request counts against: nginx's X-Real-IP when it came through nginx"""
+    if real_ip and peer in TRUSTED_PROXIES:
+        return real_ip.strip()
+    return peer
+
+
+class TokenBuckets:
+    """One token bucket per client, in a bounded LRU"""
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST, max_clients=MAX_CLIENTS,
+                 monotonic=time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self.monotonic = monotonic
+        self.buckets = OrderedDict()    # client -> [tokens, last refill]
+        self.lock = threading.Lock()
+
+    def take(self, client):
+        """0 if `client` may make a request now, else seconds until it may"""
+        if self.rate <= 0:
+            return 0
+        now = self.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                bucket = self.buckets[client] = [self.burst, now]
+                if len(self.buckets) > self.max_clients:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / self.rate
+
+
+class InFlight:
+    """API requests being handled in this process, against a soft cap"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def enter(self):
+        """Count a request in; True if that puts the process over the cap"""
+        with self.lock:
+            self.count += 1
+            return self.count > self.limit
+
+    def leave(self):
+        with self.lock:
+            self.count -= 1
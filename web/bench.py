@@ -0,0 +1,251 @@
+"""Benchmarks for the stats server.
+
+    python bench.py micro                      # stats computation, every phase
+    python bench.py load -c 1,8,32 -d 5        # HTTP load against an in-process server
+    python bench.py load --url http://host:8001   # start it with SANTA_RATE_LIMIT=0
+    python bench.py load --phases              # every endpoint at every phase (?at=)
+    python bench.py all --out results.json     # both, saved for later comparison
+    python bench.py compare base.json new.json # flag regressions between runs
+
+Results are plain JSON so runs from different commits can be diffed.
+"""
+import argparse
+import http.client
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import timeit
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import server
+from snapshots import Snapshot
+
+# One pinned moment inside each phase of the timeline
+PHASE_TIMES = {
+    "pre_season": datetime(server.YEAR, 11, 15, 12, 0, 0),
+    "production": datetime(server.YEAR, 12, 12, 15, 30, 0),
+    "final_prep": datetime(server.YEAR, 12, 24, 12, 0, 0),
+    "delivering": datetime(server.YEAR, 12, 24, 23, 15, 0),
+    "christmas_day": datetime(server.YEAR, 12, 25, 12, 0, 0),
+    "post_christmas": datetime(server.YEAR, 12, 28, 12, 0, 0),
+}
+
+MICRO_TARGETS = {
+    "calculate_progress_stats": server.calculate_progress_stats,
+    "build_stats_payload": server.build_stats_payload,
+    "build_workshop_payload": server.build_workshop_payload,
+    "build_santa_payload": server.build_santa_payload,
+    "encode_snapshot": lambda now: Snapshot(0, server.build_stats_payload(now)),
+}
+
+DEFAULT_ENDPOINTS = ["/api/stats", "/api/workshop", "/api/santa/info"]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================
+# MICRO-BENCHMARKS
+# ============================================
+
+def run_micro(repeat=5):
+    results = {}
+    for phase, now in PHASE_TIMES.items():
+        assert server.get_christmas_phase(now) == phase, phase
+        results[phase] = {}
+        for name, func in MICRO_TARGETS.items():
+            timer = timeit.Timer(lambda: func(now))
+            number, _ = timer.autorange()
+            runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+            results[phase][name] = {
+                "best_us": round(min(runs), 3),
+                "median_us": round(statistics.median(runs), 3),
+            }
+            print(f"  {phase:15} {name:26} {min(runs):9.2f} us/op")
+    return results
+
+
+# ============================================
+# HTTP LOAD GENERATOR
+# ============================================
+
+def load_worker(host, port, path, deadline, latencies, errors):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException):
+            errors.append("conn")
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_load_case(host, port, path, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=load_worker, args=(host, port, path, deadline, latencies, errors))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": to_ms(percentile(latencies, 50)),
+        "p95_ms": to_ms(percentile(latencies, 95)),
+        "p99_ms": to_ms(percentile(latencies, 99)),
+    }
+
+
+def run_load(url=None, endpoints=DEFAULT_ENDPOINTS, concurrency=(1, 8, 32), duration=5.0):
+    app = None
+    if url:
+        parts = urlsplit(url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        # In-process server on a free port, without per-request logging or the
+        # per-client rate limit (every request comes from 127.0.0.1)
+        server.ACCESS_LOG = False
+        server.rate_limits.rate = 0
+        app = server.create_app(host="127.0.0.1", port=0).start()
+        host, port = app.server_address[:2]
+
+    results = {}
+    try:
+        for path in endpoints:
+            results[path] = {}
+            for level in concurrency:
+                case = run_load_case(host, port, path, level, duration)
+                results[path][str(level)] = case
+                print(f"  {path:18} c={level:<4} {case['throughput_rps']:9.1f} req/s  "
+                      f"p50 {case['p50_ms']} ms  p95 {case['p95_ms']} ms  p99 {case['p99_ms']} ms  "
+                      f"errors {case['errors']}")
+    finally:
+        if app is not None:
+            app.shutdown()
+    return results
+
+
+# ============================================
+# COMPARISON
+# ============================================
+
+def compare(base, new, threshold):
+    """Print per-metric changes; returns the number of regressions"""
+    regressions = 0
+
+    def report(label, old, cur, higher_is_better):
+        nonlocal regressions
+        if not old or cur is None:
+            return
+        change = (cur - old) / old * 100
+        worse = change < -threshold if higher_is_better else change > threshold
+        regressions += worse
+        print(f"  {label:60} {old:>12} -> {cur:<12} {change:+6.1f}%{'  REGRESSION' if worse else ''}")
+
+    for phase, targets in base.get("micro", {}).items():
+        for name, old in targets.items():
+            cur = new.get("micro", {}).get(phase, {}).get(name)
+            if cur:
+                report(f"micro {phase} {name} (us)", old["best_us"], cur["best_us"], False)
+
+    for path, levels in base.get("load", {}).items():
+        for level, old in levels.items():
+            cur = new.get("load", {}).get(path, {}).get(level)
+            if cur:
+                report(f"load {path} c={level} (req/s)", old["throughput_rps"], cur["throughput_rps"], True)
+                report(f"load {path} c={level} p99 (ms)", old["p99_ms"], cur["p99_ms"], False)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Santa tracker benchmarks")
+    parser.add_argument("mode", choices=["micro", "load", "all", "compare"])
+    parser.add_argument("files", nargs="*", help="compare: base.json new.json")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--url", help="load-test a running server instead of an in-process one "
+                                      "(run it with SANTA_RATE_LIMIT=0)")
+    parser.add_argument("-e", "--endpoints", default=",".join(DEFAULT_ENDPOINTS))
+    parser.add_argument("-c", "--concurrency", default="1,8,32", help="comma-separated levels")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="seconds per load case")
+    parser.add_argument("--phases", action="store_true", help="load: query each phase's pinned time with ?at=")
+    parser.add_argument("--threshold", type=float, default=10.0, help="compare: regression threshold in %%")
+    args = parser.parse_args(argv)
+
+    if args.mode == "compare":
+        if len(args.files) != 2:
+            parser.error("compare needs two result files")
+        with open(args.files[0]) as f:
+            base = json.load(f)
+        with open(args.files[1]) as f:
+            new = json.load(f)
+        return 1 if compare(base, new, args.threshold) else 0
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        }
+    }
+    if args.mode in ("micro", "all"):
+        print("Stats computation (pinned clock):")
+        results["micro"] = run_micro()
+    if args.mode in ("load", "all"):
+        print("HTTP load:")
+        endpoints = [e for e in args.endpoints.split(",") if e]
+        if args.phases:
+            endpoints = [f"{e}?at={now.isoformat()}" for now in PHASE_TIMES.values() for e in endpoints]
+        results["load"] = run_load(
+            url=args.url,
+            endpoints=endpoints,
+            concurrency=[int(c) for c in args.concurrency.split(",")],
+            duration=args.duration,
+        )
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Build the static site into a deployable directory.
+
+    python build_static.py --out dist              # web/ next to this script -> dist/
+    python build_static.py --src web --out dist --workers 4
+
+What the build does:
+  * PNGs are resized to the largest size the pages display them at,
+    recompressed, and get a WebP derivative. References point at whichever
+    is smaller.
+  * Assets, stylesheets and scripts are copied to content-hashed names
+    (toy_bear.3f2a9c01de.webp) and the HTML/CSS/JS references to them are
+    rewritten, dropping the old ?v=N cache-busters. Hashed files never
+    change, so nginx serves them `immutable`.
+  * Text files get .gz siblings (and .br when the brotli module is
+    installed) for nginx's gzip_static.
+  * asset-manifest.json maps each source path to its built file.
+
+Every file is also kept under its original name, because some paths are
+built at runtime (cctv.js joins 'media/' with names from config.json).
+Python sources, scripts and dotfiles are left out.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+try:
+    import brotli
+except ImportError:     # .gz only
+    brotli = None
+
+DEFAULT_SRC = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_NAME = "asset-manifest.json"
+
+SKIP_SUFFIXES = (".py", ".pyc", ".ps1")
+SKIP_DIRS = ("__pycache__",)
+HASHED_DIRS = ("assets",)                   # Everything in here gets a hashed copy
+HASHED_SUFFIXES = (".css", ".js")           # ...as do top-level stylesheets and scripts
+TEXT_SUFFIXES = (".html", ".css", ".js", ".json", ".svg", ".csv", ".txt")
+REWRITE_SUFFIXES = (".html", ".css", ".js")
+
+HASH_LENGTH = 10            # Must match the immutable location in nginx.conf
+COMPRESS_MIN_BYTES = 1024   # Smaller files aren't worth a precompressed sibling
+MAX_IMAGE_SIDE = {          # Largest displayed size, x2 for high-DPI screens
+    "assets": 512,          # Toys are drawn at 120px, scaled up to 1.8x
+    "media": 1024,
+}
+WEBP_QUALITY = 85
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(path, data):
+    base, ext = os.path.splitext(path)
+    return f"{base}.{content_hash(data)}{ext}"
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def collect_sources(src):
+    """Relative paths (with / separators) of every file that ships"""
+    found = []
+    for root, dirs, files in os.walk(src):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS)
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(SKIP_SUFFIXES):
+                continue
+            found.append(os.path.relpath(os.path.join(root, name), src).replace(os.sep, "/"))
+    return found
+
+
+# ============================================
+# IMAGES
+# ============================================
+
+def optimize_image(job):
+    """Worker: (src path, rel path) -> (rel path, best bytes, best ext, original size)"""
+    path, rel = job
+    with open(path, "rb") as f:
+        original = f.read()
+
+    with Image.open(io.BytesIO(original)) as img:
+        img.load()
+        limit = MAX_IMAGE_SIDE.get(rel.split("/", 1)[0])
+        if limit and max(img.size) > limit:
+            img.thumbnail((limit, limit), Image.LANCZOS)
+
+        png = io.BytesIO()
+        img.save(png, "PNG", optimize=True)
+        webp = io.BytesIO()
+        img.save(webp, "WEBP", quality=WEBP_QUALITY, method=6)
+
+    candidates = [(len(original), original, ".png"),
+                  (png.tell(), png.getvalue(), ".png"),
+                  (webp.tell(), webp.getvalue(), ".webp")]
+    size, data, ext = min(candidates, key=lambda c: c[0])
+    return rel, data, ext, len(original)
+
+
+# ============================================
+# REFERENCE REWRITING
+# ============================================
+
+def rewrite_references(text, mapping):
+    """Replace every quoted/url() reference to a mapped path, dropping ?v=N"""
+    if not mapping:
+        return text
+    paths = "|".join(re.escape(path) for path in sorted(mapping, key=len, reverse=True))
+    pattern = re.compile(r"(?<![\w/.-])(" + paths + r")(\?v=\w+)?(?![\w.-])")
+    return pattern.sub(lambda m: mapping[m.group(1)], text)
+
+
+# ============================================
+# PRECOMPRESSION
+# ============================================
+
+def precompress(path, data):
+    """Write .gz/.br siblings; returns how many were written"""
+    if len(data) < COMPRESS_MIN_BYTES:
+        return 0
+    written = 0
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        write_file(path + ".gz", gz)
+        written += 1
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            write_file(path + ".br", br)
+            written += 1
+    return written
+
+
+# ============================================
+# BUILD
+# ============================================
+
+def build(src, out, workers=None):
+    sources = collect_sources(src)
+    outputs = {}        # rel path -> bytes for every file written
+    manifest = {}       # source rel path -> built rel path
+
+    def read(rel):
+        with open(os.path.join(src, rel), "rb") as f:
+            return f.read()
+
+    def publish(rel, target, data):
+        """Add a built file, under a hashed name where the source qualifies"""
+        if rel.split("/", 1)[0] in HASHED_DIRS or ("/" not in rel and rel.endswith(HASHED_SUFFIXES)):
+            target = hashed_name(target, data)
+        outputs[target] = data
+        manifest[rel] = target
+
+    # 1. Images: resized and recompressed in parallel
+    images = [rel for rel in sources if rel.lower().endswith(".png")]
+    before = after = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [(os.path.join(src, rel), rel) for rel in images]
+        for rel, data, ext, original_size in pool.map(optimize_image, jobs):
+            # The original name always holds PNG bytes, for paths built at runtime
+            outputs[rel] = data if ext == ".png" else read(rel)
+            publish(rel, os.path.splitext(rel)[0] + ext, data)
+            before += original_size
+            after += len(data)
+            print(f"  {rel:32} {original_size / 1024:8.0f} KB -> {len(data) / 1024:6.0f} KB {ext}")
+
+    # 2. Other binary assets and data files are copied unchanged
+    for rel in sources:
+        if rel not in outputs and not rel.endswith(REWRITE_SUFFIXES):
+            outputs[rel] = read(rel)
+            publish(rel, rel, outputs[rel])
+
+    # 3. Stylesheets and scripts: rewrite references to assets, then hash the result
+    for rel in sources:
+        if rel.endswith((".css", ".js")):
+            outputs[rel] = rewrite_references(read(rel).decode("utf-8"), manifest).encode("utf-8")
+            publish(rel, rel, outputs[rel])
+
+    # 4. Pages: entry points keep their names, everything they load is hashed
+    for rel in sources:
+        if rel.endswith(".html"):
+            outputs[rel] = rewrite_references(read(rel).decode("utf-8"), manifest).encode("utf-8")
+
+    if os.path.isdir(out):
+        shutil.rmtree(out)
+    compressed = 0
+    for rel, data in outputs.items():
+        path = os.path.join(out, rel)
+        write_file(path, data)
+        if rel.endswith(TEXT_SUFFIXES):
+            compressed += precompress(path, data)
+
+    # Only record files whose URL actually changes
+    manifest = {rel: target for rel, target in manifest.items() if target != rel}
+    with open(os.path.join(out, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"Images: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+    print(f"Wrote {len(outputs)} files ({len(manifest)} renamed) and "
+          f"{compressed} precompressed siblings to {out}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build optimized, content-hashed static files")
+    parser.add_argument("--src", default=DEFAULT_SRC, help="site sources (default: this directory)")
+    parser.add_argument("--out", required=True, help="output directory (replaced)")
+    parser.add_argument("--workers", type=int, default=None, help="image processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.out) == os.path.abspath(args.src):
+        parser.error("--out must not be the source directory")
+    build(args.src, args.out, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
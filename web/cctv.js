@@ -5,7 +5,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const btnNext = document.getElementById('btn-next');
 
     // Configuration
-    const CONFIG_ENDPOINT = 'config.json';
+    const PLAYLIST_ENDPOINT = '/api/cctv/playlist'; // config.json, checked against media/
+    const CONFIG_ENDPOINT = 'config.json'; // Raw list, when there's no API server
     const MEDIA_FOLDER = 'media/';
 
     // State
@@ -72,8 +73,17 @@ document.addEventListener('DOMContentLoaded', () => {
     // Initialize Video System
     async function initVideoSystem() {
         try {
-            // Force bypass cache
-            const response = await fetch(CONFIG_ENDPOINT + '?t=' + new Date().getTime());
+            // Cacheable: the server revalidates it by ETag
+            const playlist = await fetch(PLAYLIST_ENDPOINT);
+            if (playlist.ok) {
+                processPlaylist(await playlist.json());
+                return;
+            }
+        } catch (e) {
+            console.warn("CCTV playlist API unavailable, reading config.json.", e);
+        }
+        try {
+            const response = await fetch(CONFIG_ENDPOINT);
             if (response.ok) {
                 const config = await response.json();
                 if (config.files && Array.isArray(config.files) && config.files.length > 0) {
@@ -86,6 +96,17 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    // Only the clips the server found in media/, plus the live stream
+    function processPlaylist(playlist) {
+        if (playlist.missing && playlist.missing.length > 0) {
+            console.warn("CCTV clips missing from media/:", playlist.missing);
+        }
+        const files = playlist.files.map(f => f.name);
+        if (playlist.live) files.push(playlist.live.url);
+        if (files.length > 0) processConfig(files);
+        else startFallbackMode();
+    }
+
     function processConfig(files) {
         console.log("Processing Config Files:", files);
         // Separate Primary (YouTube) from Fallback (MP4s)
@@ -0,0 +1,112 @@
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# ============================================
+# SERVER CLOCK (real time or an accelerated replay)
+# ============================================
+# Every "what time is it" in the server goes through Clock.now(). Normally
+# that's datetime.now(); with a replay it's a slice of the timeline played
+# back faster than real time, looping at the end, e.g.
+#
+#   SANTA_REPLAY=2025-12-24T18:00/2025-12-25T06:00/600
+#
+# replays the whole delivery night in 10 minutes. Elapsed time comes from the
+# monotonic clock, so wall clock adjustments don't make the replay jump.
+#
+# The timeline is naive local time, so a visitor's phase and countdown are
+# the timeline evaluated at *their* local time: now in UTC plus their
+# offset. Offsets are bucketed to real-world values (quarter hours from
+# -12:00 to +14:00), which bounds how many regional snapshots a tick builds.
+
+MIN_OFFSET = -12 * 60       # Minutes east of UTC
+MAX_OFFSET = 14 * 60
+OFFSET_STEP = 15            # Every real-world offset is a multiple of this
+
+
+def parse_offset(tz=None, offset=None, when=None):
+    """?tz=<IANA name> or ?offset=<±HH:MM | ±HHMM | ±hours | minutes east> -> bucketed minutes, or None"""
+    if tz:
+        try:
+            zone = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown time zone {tz!r}") from None
+        when = (when or datetime.now()).astimezone(timezone.utc)
+        minutes = zone.utcoffset(when).total_seconds() / 60
+    elif offset:
+        text = offset.strip().upper().removeprefix("UTC")
+        digits = text[1:] if text[:1] in ("+", "-") else text
+        try:
+            if ":" in text:
+                hours, _, mins = text.partition(":")
+                if not (len(mins) == 2 and mins.isdigit()) or int(mins) >= 60:
+                    raise ValueError(text)
+                sign = -1 if hours.startswith("-") else 1
+                minutes = int(hours) * 60 + sign * int(mins)
+            elif len(digits) == 4 and digits.isdigit():
+                # ISO 8601 basic form, "+0530": no offset runs to 1000 minutes
+                sign = -1 if text.startswith("-") else 1
+                hours, mins = int(digits[:2]), int(digits[2:])
+                if mins >= 60:
+                    raise ValueError(text)
+                minutes = sign * (hours * 60 + mins)
+            else:
+                minutes = int(text)
+                if abs(minutes) <= 14:
+                    minutes *= 60   # "+2", "UTC-5": whole hours
+        except ValueError:
+            raise ValueError(f"Bad offset {offset!r} (expected ±HH:MM, ±HHMM or minutes east of UTC)") from None
+    else:
+        return None
+    bucket = round(minutes / OFFSET_STEP) * OFFSET_STEP
+    return min(max(bucket, MIN_OFFSET), MAX_OFFSET)
+
+
+def at_offset(moment, offset):
+    """Naive local datetime (or epoch seconds) -> naive wall time at a UTC offset"""
+    if isinstance(moment, (int, float)):
+        utc = datetime.fromtimestamp(moment, timezone.utc)
+    else:
+        utc = moment.astimezone(timezone.utc)
+    return (utc + timedelta(minutes=offset)).replace(tzinfo=None)
+
+
+class Clock:
+    """Naive local datetimes, from the wall clock or a looping replay"""
+
+    def __init__(self, start=None, end=None, duration=None, monotonic=time.monotonic):
+        self.start = start
+        self.end = end
+        self.monotonic = monotonic
+        self.origin = monotonic()
+        if start is not None:
+            if end <= start or duration <= 0:
+                raise ValueError("Replay needs start < end and a positive duration")
+            self.span = (end - start).total_seconds()
+            self.speed = self.span / duration
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Clock for a START/END/SECONDS replay spec, or the real clock if empty"""
+        if not spec:
+            return cls()
+        try:
+            start, end, duration = spec.split("/")
+            return cls(datetime.fromisoformat(start), datetime.fromisoformat(end), float(duration))
+        except ValueError as e:
+            raise ValueError(f"Bad replay {spec!r} (expected START/END/SECONDS): {e}") from None
+
+    @property
+    def replaying(self):
+        return self.start is not None
+
+    def now(self):
+        if self.start is None:
+            return datetime.now()
+        elapsed = (self.monotonic() - self.origin) * self.speed % self.span
+        return self.start + timedelta(seconds=elapsed)
+
+    def describe(self):
+        if self.start is None:
+            return "real time"
+        return f"replaying {self.start.isoformat()} -> {self.end.isoformat()} at {self.speed:g}x"
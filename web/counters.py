@@ -0,0 +1,139 @@
+import hashlib
+import math
+import mmap
+import struct
+import time
+
+# ============================================
+# SHARED LIVE COUNTERS
+# ============================================
+# The per-second counters live in an anonymous MAP_SHARED mmap created before
+# any worker is forked, so every process sees the same bytes. One ticker
+# writes; any number of workers read without taking a lock, using a seqlock:
+# the writer bumps a sequence number to odd before writing and back to even
+# after, and readers retry if the number was odd or changed under them.
+
+FIELDS = (
+    ("toysMadeToday", "q"),
+    ("cookiesEatenToday", "q"),
+    ("lastUpdate", "d"),
+)
+
+_SEQ = struct.Struct("<Q")
+_VALUES = struct.Struct("<" + "".join(kind for _, kind in FIELDS))
+_NAMES = tuple(name for name, _ in FIELDS)
+
+
+class SharedCounters:
+    """Fixed set of counters readable from every forked worker"""
+
+    def __init__(self, **initial):
+        self._map = mmap.mmap(-1, _SEQ.size + _VALUES.size)
+        values = dict.fromkeys(_NAMES, 0)
+        values.update(initial)
+        self.write(values)
+
+    def snapshot(self):
+        """Consistent copy of every counter (never a half-written mix)"""
+        while True:
+            before = _SEQ.unpack_from(self._map, 0)[0]
+            if before & 1:
+                continue    # Writer mid-update
+            values = _VALUES.unpack_from(self._map, _SEQ.size)
+            if _SEQ.unpack_from(self._map, 0)[0] == before:
+                return dict(zip(_NAMES, values))
+
+    def write(self, values):
+        """Replace the counters. Only ever called from the single ticker."""
+        seq = _SEQ.unpack_from(self._map, 0)[0]
+        _SEQ.pack_into(self._map, 0, seq + 1)
+        _VALUES.pack_into(self._map, _SEQ.size, *(values[name] for name in _NAMES))
+        _SEQ.pack_into(self._map, 0, seq + 2)
+
+    def __getitem__(self, name):
+        return self.snapshot()[name]
+
+
+# ============================================
+# ANALYTIC COUNTERS (no ticker)
+# ============================================
+# Instead of a thread adding random increments every second, each counter is
+# a pure function of the whole second it's read in:
+#
+#   S(n) = mean * n + spread * noise(n),   noise(n) in [0, 1)
+#
+# so the increment from second n to n+1 is mean + spread * (noise(n+1) -
+# noise(n)), which always falls within the ticker's (low, high) range. Each
+# counter is its base value plus S(now) - S(origin), taken only over the
+# seconds inside the phase windows where it grows. That's a handful of
+# multiplications per read, it never goes backwards, and every reader in
+# every process gets the same number for the same second.
+#
+# The base values and their origin time live in a SharedCounters, so a
+# restore in the pre-fork parent is seen by every worker.
+
+_MASK64 = (1 << 64) - 1
+
+
+def _noise(seed, n):
+    """Deterministic value in [0, 1) for second n (splitmix64)"""
+    z = (seed + n * 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return ((z ^ (z >> 31)) >> 11) / (1 << 53)
+
+
+def _hash_name(text):
+    """Stable (unlike hash()) 64-bit hash of a string"""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+class AnalyticCounters:
+    """Live counters derived on read from elapsed time and seeded noise"""
+
+    def __init__(self, rates, windows, seed=0, clock=time.monotonic, **initial):
+        """
+        rates:   {phase: {counter: (low, high) increment per second}}
+        windows: {phase: (start, end) epoch seconds}
+        initial: starting values; lastUpdate is the time they're valid at
+        """
+        self.clock = clock
+        # Wall time from the monotonic clock, so wall clock steps can't move counters
+        self.wall_origin = time.time()
+        self.clock_origin = clock()
+
+        self.terms = []     # (counter, window start, window end, mean, spread, seed)
+        for phase, counters in rates.items():
+            start, end = windows[phase]
+            for name, (low, high) in counters.items():
+                salt = seed ^ _hash_name(phase + ":" + name)
+                self.terms.append((name, int(start), int(end), (low + high) / 2, (high - low) / 2, salt))
+
+        initial.setdefault("lastUpdate", self.wall_origin)
+        self.base = SharedCounters(**initial)
+
+    def now(self):
+        return self.wall_origin + (self.clock() - self.clock_origin)
+
+    def snapshot(self):
+        """Every counter as of the current whole second"""
+        base = self.base.snapshot()
+        origin = int(base["lastUpdate"])
+        second = max(int(self.now()), origin)
+
+        values = dict(base)
+        for name, start, end, mean, spread, salt in self.terms:
+            a = min(max(origin, start), end)
+            b = min(max(second, start), end)
+            if b > a:
+                values[name] += (math.floor(mean * b + spread * _noise(salt, b))
+                                 - math.floor(mean * a + spread * _noise(salt, a)))
+        values["lastUpdate"] = float(second)
+        return values
+
+    def write(self, values):
+        """Rebase: `values` are the counters as of values['lastUpdate']"""
+        self.base.write(values)
+
+    def __getitem__(self, name):
+        return self.snapshot()[name]
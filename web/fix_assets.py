@@ -1,91 +1,175 @@
-from PIL import Image
+"""Remove the flat/checkerboard backgrounds baked into the toy PNGs.
+
+    python fix_assets.py                 # web/assets next to this script
+    python fix_assets.py path/to/assets --workers 8
+    python fix_assets.py --force         # ignore the manifest, redo everything
+
+The background is the area of the image connected to a corner that is
+within BG_TOLERANCE of the top-left pixel's colour. It is made fully
+transparent, and then any leftover checkerboard grey is removed as well.
+All of this is done with NumPy array operations on the whole image.
+
+Files run in parallel across a process pool. A content-hash manifest in the
+asset directory remembers what each cleaned file looks like, so files that
+haven't changed since the last run are skipped without being decoded.
+"""
+import argparse
+import hashlib
+import json
 import os
-import glob
-from collections import deque
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+try:
+    from scipy import ndimage
+except ImportError:     # Pure NumPy fallback below
+    ndimage = None
+
+BG_TOLERANCE = 30           # Sum of RGB differences from the corner colour
+GREY_TARGET = (157, 157, 157)   # Checkerboard grey left behind by flood fill
+GREY_TOLERANCE = 5
+MANIFEST_NAME = ".fix_assets_manifest.json"
+DEFAULT_ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-assets_dir = r"c:\Users\panca\.gemini\antigravity\scratch\santa_tracker\web\assets"
-files = glob.glob(os.path.join(assets_dir, "*.png"))
 
-print(f"Checking {len(files)} files for background removal (Flood Fill)...")
+def color_distance(rgb, color):
+    """Per-pixel sum of absolute RGB differences from one colour"""
+    return np.abs(rgb - np.asarray(color[:3], dtype=np.int16)).sum(axis=-1)
 
-def color_distance(c1, c2):
-    return sum(abs(a - b) for a, b in zip(c1[:3], c2[:3]))
 
-def flood_fill_transparency(img):
-    width, height = img.size
-    pixels = img.load()
-    
-    # Sample the top-left corner as the "background color"
-    # We'll assume the corner is ALWAYS background for these assets
+def connected_to(mask, seeds):
+    """Pixels of `mask` 4-connected to any seed pixel"""
+    if ndimage is not None:
+        labels, _ = ndimage.label(mask)     # Default structure is 4-connectivity
+        wanted = np.unique(labels[seeds & mask])
+        return np.isin(labels, wanted[wanted > 0])
+
+    # Morphological reconstruction: grow the seeds inside the mask until stable
+    region = seeds & mask
+    while True:
+        grown = region.copy()
+        grown[1:, :] |= region[:-1, :]
+        grown[:-1, :] |= region[1:, :]
+        grown[:, 1:] |= region[:, :-1]
+        grown[:, :-1] |= region[:, 1:]
+        grown &= mask
+        if np.array_equal(grown, region):
+            return region
+        region = grown
+
+
+def flood_fill_transparency(pixels):
+    """Clear the background connected to the corners; returns True if anything changed"""
     bg_color = pixels[0, 0]
-    
-    # If already transparent, maybe start from other corners?
-    # But for now, assume 0,0 is the key.
     if bg_color[3] == 0:
-        return False # Already transparent
-
-    queue = deque([(0, 0), (width-1, 0), (0, height-1), (width-1, height-1)])
-    visited = set()
-    
-    # Initialize queue with corners that match the background color
-    valid_starts = []
-    for x, y in queue:
-        if color_distance(pixels[x, y], bg_color) < 30: # Tolerance of 30
-            valid_starts.append((x,y))
-            visited.add((x,y))
-    
-    queue = deque(valid_starts)
-
-    changed = False
-    while queue:
-        x, y = queue.popleft()
-        
-        # Make transparent
-        if pixels[x,y][3] != 0:
-            pixels[x, y] = (0, 0, 0, 0)
-            changed = True
-        
-        # Check neighbors
-        for nx, ny in [(x+1, y), (x-1, y), (x, y+1), (x, y-1)]:
-            if 0 <= nx < width and 0 <= ny < height:
-                if (nx, ny) not in visited:
-                    # Check if neighbor matches the BACKGROUND color
-                    if color_distance(pixels[nx, ny], bg_color) < 30:
-                        visited.add((nx, ny))
-                        queue.append((nx, ny))
-                    # Stop at edges (color difference > 30)
-    
-    return changed
-
-def remove_grey_artifacts(img, tolerance=5):
-    # specifically target the 157,157,157 grey from the checkerboard
-    # because flood fill might fail if the white connecting squares are already gone
-    pixels = img.load()
-    width, height = img.size
-    target = (157, 157, 157)
-    changed = False
-    
-    for y in range(height):
-        for x in range(width):
-            if pixels[x,y][3] != 0:
-                if color_distance(pixels[x,y], target) < tolerance:
-                    pixels[x, y] = (0, 0, 0, 0)
-                    changed = True
-    return changed
-
-for file_path in files:
+        return False    # Already transparent
+
+    rgb = pixels[..., :3].astype(np.int16)
+    background = color_distance(rgb, bg_color) < BG_TOLERANCE
+
+    seeds = np.zeros_like(background)
+    seeds[0, 0] = seeds[0, -1] = seeds[-1, 0] = seeds[-1, -1] = True
+
+    cleared = connected_to(background, seeds) & (pixels[..., 3] != 0)
+    pixels[cleared] = 0
+    return bool(cleared.any())
+
+
+def remove_grey_artifacts(pixels, tolerance=GREY_TOLERANCE):
+    # Flood fill can't reach grey squares once the white ones around them are gone
+    rgb = pixels[..., :3].astype(np.int16)
+    grey = (pixels[..., 3] != 0) & (color_distance(rgb, GREY_TARGET) < tolerance)
+    pixels[grey] = 0
+    return bool(grey.any())
+
+
+def process_file(path):
+    """Worker: clean one PNG in place; returns (name, message, hash after)"""
+    name = os.path.basename(path)
     try:
-        img = Image.open(file_path)
-        img = img.convert("RGBA")
-        
-        c1 = flood_fill_transparency(img)
-        c2 = remove_grey_artifacts(img)
-        
+        with Image.open(path) as img:
+            pixels = np.array(img.convert("RGBA"))
+
+        c1 = flood_fill_transparency(pixels)
+        c2 = remove_grey_artifacts(pixels)
+
         if c1 or c2:
-            img.save(file_path, "PNG")
-            print(f"Cleaned background for: {os.path.basename(file_path)}")
+            Image.fromarray(pixels, "RGBA").save(path, "PNG")
+            message = f"Cleaned background for: {name}"
         else:
-            print(f"No background changes for: {os.path.basename(file_path)}")
-
+            message = f"No background changes for: {name}"
+        return name, message, file_hash(path)
     except Exception as e:
-        print(f"Error processing {file_path}: {e}")
+        return name, f"Error processing {path}: {e}", None
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove baked-in backgrounds from PNG assets")
+    parser.add_argument("assets_dir", nargs="?", default=DEFAULT_ASSETS_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="reprocess files the manifest says are clean")
+    args = parser.parse_args(argv)
+
+    files = sorted(
+        os.path.join(args.assets_dir, name)
+        for name in os.listdir(args.assets_dir)
+        if name.lower().endswith(".png")
+    )
+    manifest_path = os.path.join(args.assets_dir, MANIFEST_NAME)
+    manifest = {} if args.force else load_manifest(manifest_path)
+
+    pending = []
+    for path in files:
+        name = os.path.basename(path)
+        if manifest.get(name) == file_hash(path):
+            print(f"Unchanged, skipping: {name}")
+        else:
+            pending.append(path)
+
+    print(f"Checking {len(pending)} of {len(files)} files for background removal...")
+    failures = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            for name, message, digest in pool.map(process_file, pending):
+                print(message)
+                if digest is None:
+                    failures += 1
+                    manifest.pop(name, None)
+                else:
+                    manifest[name] = digest
+
+    # Forget files that no longer exist
+    present = {os.path.basename(path) for path in files}
+    manifest = {name: digest for name, digest in manifest.items() if name in present}
+    save_manifest(manifest_path, manifest)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import math
+import mmap
+import time
+
+try:
+    import numpy as np
+except ImportError:     # Falls back to plain loops over the memoryview
+    np = None
+
+# ============================================
+# SERVED-STATS HISTORY
+# ============================================
+# The served numbers can't be recomputed afterwards (the variance term, the
+# random counter increments), so the ticker records every tick's stats into
+# a fixed-size ring for /api/stats/history sparklines.
+#
+# Samples are downsampled on insert into several levels, each a ring of
+# buckets holding min/max/sum/count per field:
+#
+#   1s buckets for the last hour, 1min for the last day, 1h for 40 days
+#
+# so a query scans at most a few thousand buckets whatever the window. The
+# storage is column-wise (one contiguous run of doubles per level, field and
+# aggregate) in an anonymous MAP_SHARED mmap, like metrics.py: the ticker is
+# the only writer and pre-forked workers read it. A reader racing the ticker
+# can see one bucket mid-update, which a sparkline won't show. Queries view
+# the same memory as NumPy arrays and reduce whole columns at once.
+
+LEVELS = (      # (seconds per bucket, buckets kept)
+    (1, 3600),
+    (60, 1440),
+    (3600, 960),
+)
+AGGREGATES = ("min", "max", "sum", "count")
+MAX_POINTS = 1000   # Buckets one query may return
+
+
+class HistoryError(ValueError):
+    """Bad window/resolution/fields for a history query"""
+
+
+class History:
+    """Multi-resolution ring of per-tick samples, stored column-wise"""
+
+    def __init__(self, fields, levels=LEVELS):
+        self.fields = tuple(fields)
+        self.levels = levels
+        self.column_size = [buckets for _, buckets in levels]
+        # Per level: a column of bucket numbers (which bucket each slot holds)
+        # followed by one column per (field, aggregate)
+        self.offsets = []
+        total = 0
+        for buckets in self.column_size:
+            self.offsets.append(total)
+            total += buckets * (1 + len(self.fields) * len(AGGREGATES))
+        self._map = mmap.mmap(-1, 8 * total)
+        self.values = memoryview(self._map).cast("d")
+        self.array = None if np is None else np.frombuffer(self._map, dtype=np.float64)
+        for level, buckets in enumerate(self.column_size):
+            for slot in range(buckets):
+                self.values[self.offsets[level] + slot] = -1     # Holds no bucket yet
+
+    def _column(self, level, field, aggregate):
+        buckets = self.column_size[level]
+        return (self.offsets[level] + buckets
+                + (field * len(AGGREGATES) + aggregate) * buckets)
+
+    # --------------------------------------------
+    # Writing (ticker only)
+    # --------------------------------------------
+
+    def record(self, sample, when=None):
+        """Add one tick's payload; non-numeric and missing fields are skipped"""
+        when = time.time() if when is None else when
+        v = self.values
+        numbers = [(f, float(sample[name])) for f, name in enumerate(self.fields)
+                   if isinstance(sample.get(name), (int, float))]
+        for level, (step, buckets) in enumerate(self.levels):
+            bucket = int(when // step)
+            slot = bucket % buckets
+            stamp = self.offsets[level] + slot
+            if v[stamp] != bucket:
+                for f in range(len(self.fields)):
+                    base = self._column(level, f, 0) + slot
+                    v[base] = math.inf
+                    v[base + buckets] = -math.inf
+                    v[base + 2 * buckets] = 0
+                    v[base + 3 * buckets] = 0
+                v[stamp] = bucket
+            for f, value in numbers:
+                base = self._column(level, f, 0) + slot
+                if value < v[base]:
+                    v[base] = value
+                if value > v[base + buckets]:
+                    v[base + buckets] = value
+                v[base + 2 * buckets] += value
+                v[base + 3 * buckets] += 1
+
+    # --------------------------------------------
+    # Reading
+    # --------------------------------------------
+
+    def query(self, window, resolution, fields=None, now=None):
+        """min/max/avg per `resolution`-second bucket over the last `window` seconds.
+
+        Column-oriented, like the season series:
+          {"t": [...], "resolution": 60, "toysMade": {"min": [...], "max": [...], "avg": [...]}}
+        Buckets with no samples are null.
+        """
+        now = time.time() if now is None else now
+        names = self.fields if fields is None else fields
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise HistoryError(f"Unknown history fields: {', '.join(map(repr, unknown))}")
+        if window <= 0 or resolution <= 0:
+            raise HistoryError("window and resolution must be positive")
+
+        level, step = self._level_for(window, resolution)
+        resolution = max(step, resolution // step * step)
+        if window / resolution > MAX_POINTS:
+            raise HistoryError(f"At most {MAX_POINTS} points (window / resolution)")
+
+        per_point = resolution // step
+        last = int(now // step)
+        first = (last - int(window // step) + 1) // per_point * per_point
+        points = -(-(last + 1 - first) // per_point)
+        indexes = [self.fields.index(name) for name in names]
+        if self.array is not None:
+            aggregates = self._reduce_arrays(level, indexes, first, last, per_point, points)
+        else:
+            aggregates = self._reduce_loops(level, indexes, first, last, per_point, points)
+
+        result = {"t": [(first + p * per_point) * step for p in range(points)], "resolution": resolution}
+        for name, (mins, maxes, sums, counts) in zip(names, aggregates):
+            result[name] = {
+                "min": [m if c else None for m, c in zip(mins, counts)],
+                "max": [m if c else None for m, c in zip(maxes, counts)],
+                "avg": [t / c if c else None for t, c in zip(sums, counts)],
+            }
+        return result
+
+    def _reduce_arrays(self, level, indexes, first, last, per_point, points):
+        """Per field: (mins, maxes, sums, counts) lists, one entry per point"""
+        buckets = self.column_size[level]
+        start = self.offsets[level]
+        stamps = self.array[start:start + buckets]
+        columns = self.array[start + buckets:start + buckets * (1 + len(self.fields) * len(AGGREGATES))]
+        columns = columns.reshape(len(self.fields), len(AGGREGATES), buckets)[indexes]
+
+        wanted = np.arange(first, first + points * per_point)
+        slots = wanted % buckets
+        held = (stamps[slots] == wanted) & (wanted <= last)   # Slot still holds that bucket
+        picked = columns[:, :, slots]                          # (fields, aggregates, buckets)
+        counts = np.where(held, picked[:, 3], 0)
+        filled = counts > 0
+        shape = (len(indexes), points, per_point)
+        mins = np.where(filled, picked[:, 0], np.inf).reshape(shape).min(axis=2)
+        maxes = np.where(filled, picked[:, 1], -np.inf).reshape(shape).max(axis=2)
+        sums = np.where(filled, picked[:, 2], 0).reshape(shape).sum(axis=2)
+        counts = counts.reshape(shape).sum(axis=2)
+        return [(mins[f].tolist(), maxes[f].tolist(), sums[f].tolist(), counts[f].tolist())
+                for f in range(len(indexes))]
+
+    def _reduce_loops(self, level, indexes, first, last, per_point, points):
+        """_reduce_arrays without NumPy"""
+        buckets = self.column_size[level]
+        v = self.values
+        stamps = self.offsets[level]
+        point_slots = [
+            [b % buckets for b in range(point, min(point + per_point, last + 1))
+             if v[stamps + b % buckets] == b]
+            for point in range(first, first + points * per_point, per_point)
+        ]
+        reduced = []
+        for f in indexes:
+            base = self._column(level, f, 0)
+            mins, maxes, sums, counts = [], [], [], []
+            for slots in point_slots:
+                filled = [s for s in slots if v[base + 3 * buckets + s]]
+                mins.append(min((v[base + s] for s in filled), default=0))
+                maxes.append(max((v[base + buckets + s] for s in filled), default=0))
+                sums.append(sum(v[base + 2 * buckets + s] for s in filled))
+                counts.append(sum(v[base + 3 * buckets + s] for s in filled))
+            reduced.append((mins, maxes, sums, counts))
+        return reduced
+
+    def _level_for(self, window, resolution):
+        """Coarsest level that still covers `window` at `resolution` (else the finest that covers it)"""
+        covering = [(level, step) for level, (step, buckets) in enumerate(self.levels)
+                    if step * buckets >= window]
+        if not covering:
+            longest = max(step * buckets for step, buckets in self.levels)
+            raise HistoryError(f"History only goes back {longest} seconds")
+        fitting = [(level, step) for level, step in covering if step <= resolution]
+        return fitting[-1] if fitting else covering[0]
@@ -0,0 +1,108 @@
+// === LIVE STATS ===
+// One Server-Sent Events stream per page (/api/stream), with plain polling
+// as a fallback for browsers/proxies that can't hold the stream open.
+const SantaLive = (() => {
+    const BUNDLE_URL = '/api/bundle';
+    const STALL_TIMEOUT = 20000; // No event for this long -> poll until it recovers
+    // Phase and countdown follow the visitor's own clock (minutes east of UTC)
+    const REGION = 'offset=' + (-new Date().getTimezoneOffset());
+
+    function isObject(value) {
+        return value !== null && typeof value === 'object' && !Array.isArray(value);
+    }
+
+    // Delta sync: merge a ?since= patch into a copy of what we had
+    function applyPatch(target, patch) {
+        const out = Object.assign({}, target);
+        Object.keys(patch).forEach((key) => {
+            out[key] = isObject(patch[key]) && isObject(out[key])
+                ? applyPatch(out[key], patch[key])
+                : patch[key];
+        });
+        return out;
+    }
+
+    function removePath(target, path) {
+        const out = Object.assign({}, target);
+        const [key, ...rest] = path;
+        if (!rest.length) delete out[key];
+        else if (isObject(out[key])) out[key] = removePath(out[key], rest);
+        return out;
+    }
+
+    function subscribe(channels, onUpdate, pollInterval = 2000) {
+        let pollTimer = null;
+        let stallTimer = null;
+        let bundle = {};
+        let version = 0; // 0 = we have nothing yet, the server sends it all
+
+        async function poll() {
+            // Every channel in one round trip, and only what changed since the last one
+            try {
+                const res = await fetch(BUNDLE_URL + '?include=' + channels.join(',') + '&' + REGION
+                    + '&since=' + version);
+                if (!res.ok) return;
+                const delta = await res.json();
+                bundle = delta.full ? delta.data
+                    : delta.removed.reduce(removePath, applyPatch(bundle, delta.patch));
+                version = delta.version;
+                channels.forEach((channel) => onUpdate(channel, bundle[channel]));
+            } catch (e) {
+                console.error(`Live ${channels.join(', ')} offline`, e);
+            }
+        }
+
+        function startPolling() {
+            if (pollTimer) return;
+            poll();
+            pollTimer = setInterval(poll, pollInterval);
+        }
+
+        function stopPolling() {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+
+        function connect() {
+            if (!window.EventSource) {
+                startPolling();
+                return;
+            }
+
+            const source = new EventSource('/api/stream?channels=' + channels.join(',') + '&' + REGION);
+
+            function resetStallTimer() {
+                clearTimeout(stallTimer);
+                stallTimer = setTimeout(startPolling, STALL_TIMEOUT);
+            }
+
+            channels.forEach((channel) => {
+                source.addEventListener(channel, (event) => {
+                    stopPolling();
+                    resetStallTimer();
+                    onUpdate(channel, JSON.parse(event.data));
+                });
+            });
+
+            source.onerror = () => {
+                // The browser retries on its own; poll meanwhile, or for good if it gave up
+                startPolling();
+                if (source.readyState === EventSource.CLOSED) clearTimeout(stallTimer);
+            };
+
+            resetStallTimer();
+        }
+
+        // Pages served with their first payloads inlined (pages.py) paint at
+        // once; their connections are then spread out instead of all at load
+        const bootstrap = window.SANTA_BOOTSTRAP;
+        if (bootstrap && channels.every((channel) => channel in bootstrap)) {
+            channels.forEach((channel) => onUpdate(channel, bootstrap[channel]));
+            setTimeout(connect, Math.random() * pollInterval);
+        } else {
+            connect();
+        }
+    }
+
+    return { subscribe };
+})();
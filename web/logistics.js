@@ -12,10 +12,8 @@ document.addEventListener('DOMContentLoaded', () => {
         carrots: document.getElementById('carrots')
     };
 
-    // Configuration - now using local API!
-    const SANTA_API = '/api/santa/info';
-    const STATS_API = '/api/stats';
-    const REFRESH_RATE = 3000; // 3 seconds for smoother updates
+    // Configuration - live from the local API (SSE, polling as fallback)
+    const REFRESH_RATE = 3000; // Fallback poll interval
 
     // Detect User Timezone
     try {
@@ -28,23 +26,13 @@ document.addEventListener('DOMContentLoaded', () => {
         // ignore
     }
 
-    // Fetch both Santa location and stats
-    async function fetchAllData() {
-        try {
-            const [santaRes, statsRes] = await Promise.all([
-                fetch(SANTA_API),
-                fetch(STATS_API)
-            ]);
+    // Latest Santa location and stats, each pushed on its own channel
+    const latest = { santa: null, stats: null };
 
-            if (!santaRes.ok || !statsRes.ok) throw new Error('API Error');
-
-            const santaData = await santaRes.json();
-            const statsData = await statsRes.json();
-
-            updateDashboard(santaData, statsData);
-        } catch (error) {
-            console.error('Error fetching data:', error);
-            showOfflineState();
+    function onLiveUpdate(channel, data) {
+        latest[channel] = data;
+        if (latest.santa && latest.stats) {
+            updateDashboard(latest.santa, latest.stats);
         }
     }
 
@@ -244,7 +232,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    // Initial fetch and interval
-    fetchAllData();
-    setInterval(fetchAllData, REFRESH_RATE);
+    // Radar scans until the first update arrives
+    showOfflineState();
+    SantaLive.subscribe(['santa', 'stats'], onLiveUpdate, REFRESH_RATE);
 });
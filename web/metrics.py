@@ -0,0 +1,266 @@
+import collections
+import functools
+import mmap
+import os
+import sys
+import threading
+import time
+
+# ============================================
+# METRICS (Prometheus text format)
+# ============================================
+# Request counts, latency histograms, bytes sent and in-flight requests per
+# route, time spent in the stats calculation, and how far the 1s ticker is
+# running behind.
+#
+# Everything lives in an anonymous MAP_SHARED mmap (like SharedCounters), so
+# a scrape of any pre-forked worker reports the whole server. Each process
+# (every worker, and the pre-fork parent running the ticker) writes only its
+# own slot and /api/metrics sums the slots. Writes happen
+# under a per-process lock; readers don't lock. Aligned 8-byte stores can't
+# tear, so the worst a scrape can see is a count one request ahead of its
+# histogram.
+
+ROUTES = (
+    "/api/stats", "/api/stats/series", "/api/stats/history", "/api/workshop", "/api/santa/info",
+    "/api/bundle", "/api/cctv/playlist", "/api/stream", "/api/metrics", "api_other", "static",
+)
+STATUS_CLASSES = ("2xx", "3xx", "4xx", "5xx")
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+TIMERS = ("calculate_progress_stats",)
+TIMER_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)
+
+TICK_FIELDS = ("ticks", "lag_sum", "lag_last", "lag_max")   # Written by the ticker only
+MAX_SLOTS = 64      # Processes that can report (one slot each)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metrics:
+    """Shared-memory counters for every worker, rendered for Prometheus"""
+
+    def __init__(self, slots=MAX_SLOTS):
+        # Per route: one count per status class, one per latency bucket
+        # (+ overflow), sum of seconds, bytes sent
+        self.route_size = len(STATUS_CLASSES) + len(LATENCY_BUCKETS) + 1 + 2
+        self.timer_size = len(TIMER_BUCKETS) + 1 + 1
+        self.slot_size = len(ROUTES) * self.route_size + len(TIMERS) * self.timer_size + 1
+        self.slots = slots
+        self.slot = 0
+
+        self._map = mmap.mmap(-1, 8 * (len(TICK_FIELDS) + slots * self.slot_size))
+        self.values = memoryview(self._map).cast("d")
+        self.lock = threading.Lock()
+
+    # --------------------------------------------
+    # Writing
+    # --------------------------------------------
+
+    def claim(self, slot):
+        """Write into `slot` from now on (a forked worker, or the pre-fork parent)"""
+        self.slot = slot
+        self.lock = threading.Lock()    # The parent's may have been held at fork
+        self.values[self._base(slot) + self.slot_size - 1] = 0   # A dead predecessor's in-flight
+
+    def _base(self, slot):
+        return len(TICK_FIELDS) + slot * self.slot_size
+
+    def _route_base(self, route):
+        return self._base(self.slot) + ROUTES.index(route) * self.route_size
+
+    def request_started(self):
+        with self.lock:
+            self.values[self._base(self.slot) + self.slot_size - 1] += 1
+
+    def request_finished(self, route, status, seconds, sent):
+        i = self._route_base(route)
+        status_class = min(max(status // 100, 2), 5) - 2
+        bucket = _bucket_index(LATENCY_BUCKETS, seconds)
+        with self.lock:
+            self.values[self._base(self.slot) + self.slot_size - 1] -= 1
+            v = self.values
+            v[i + status_class] += 1
+            i += len(STATUS_CLASSES)
+            v[i + bucket] += 1
+            i += len(LATENCY_BUCKETS) + 1
+            v[i] += seconds
+            v[i + 1] += sent
+
+    def observe(self, timer, seconds):
+        i = (self._base(self.slot) + len(ROUTES) * self.route_size
+             + TIMERS.index(timer) * self.timer_size)
+        with self.lock:
+            self.values[i + _bucket_index(TIMER_BUCKETS, seconds)] += 1
+            self.values[i + len(TIMER_BUCKETS) + 1] += seconds
+
+    def timed(self, timer):
+        """Decorator: record each call's duration under `timer`"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(timer, time.perf_counter() - started)
+            return wrapper
+        return decorate
+
+    def observe_tick(self, lag):
+        """Ticker: seconds this tick started later than 1s after the previous one"""
+        with self.lock:
+            v = self.values
+            v[0] += 1
+            v[1] += lag
+            v[2] = lag
+            v[3] = max(v[3], lag)
+
+    # --------------------------------------------
+    # Reading
+    # --------------------------------------------
+
+    def _sum(self, offset, length):
+        """Element-wise sum of one block across every slot"""
+        total = [0.0] * length
+        for slot in range(self.slots):
+            start = self._base(slot) + offset
+            for k, value in enumerate(self.values[start:start + length]):
+                total[k] += value
+        return total
+
+    def render(self):
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, labels, buckets, counts, total):
+            running = 0
+            for bound, count in zip(buckets, counts):
+                running += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running:.0f}')
+            running += counts[len(buckets)]
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {running:.0f}')
+            lines.append(f"{name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{name}_count{{{labels}}} {running:.0f}")
+
+        per_route = {route: self._sum(r * self.route_size, self.route_size)
+                     for r, route in enumerate(ROUTES)}
+        n_status, n_buckets = len(STATUS_CLASSES), len(LATENCY_BUCKETS) + 1
+
+        header("santa_http_requests_total", "counter", "HTTP requests by route and status class")
+        for route, block in per_route.items():
+            for status, count in zip(STATUS_CLASSES, block):
+                lines.append(f'santa_http_requests_total{{route="{route}",status="{status}"}} {count:.0f}')
+
+        header("santa_http_request_duration_seconds", "histogram", "Time to handle a request")
+        for route, block in per_route.items():
+            histogram("santa_http_request_duration_seconds", f'route="{route}"', LATENCY_BUCKETS,
+                      block[n_status:n_status + n_buckets], block[n_status + n_buckets])
+
+        header("santa_http_response_bytes_total", "counter", "Response body bytes sent")
+        for route, block in per_route.items():
+            lines.append(f'santa_http_response_bytes_total{{route="{route}"}} {block[-1]:.0f}')
+
+        header("santa_http_requests_in_flight", "gauge", "Requests being handled right now")
+        in_flight = self._sum(self.slot_size - 1, 1)[0]
+        lines.append(f"santa_http_requests_in_flight {max(in_flight, 0):.0f}")
+
+        header("santa_function_duration_seconds", "histogram", "Time spent in hot server functions")
+        timers_base = len(ROUTES) * self.route_size
+        for t, timer in enumerate(TIMERS):
+            block = self._sum(timers_base + t * self.timer_size, self.timer_size)
+            histogram("santa_function_duration_seconds", f'function="{timer}"', TIMER_BUCKETS,
+                      block, block[-1])
+
+        ticks, lag_sum, lag_last, lag_max = self.values[:len(TICK_FIELDS)]
+        header("santa_ticks_total", "counter", "Simulation ticks run")
+        lines.append(f"santa_ticks_total {ticks:.0f}")
+        header("santa_tick_lag_seconds_total", "counter", "Total time ticks started late")
+        lines.append(f"santa_tick_lag_seconds_total {lag_sum!r}")
+        header("santa_tick_lag_seconds", "gauge", "How late the last tick started")
+        lines.append(f"santa_tick_lag_seconds {lag_last!r}")
+        header("santa_tick_lag_seconds_max", "gauge", "Worst tick lag since the server started")
+        lines.append(f"santa_tick_lag_seconds_max {lag_max!r}")
+
+        return ("\n".join(lines) + "\n").encode()
+
+
+def _bucket_index(buckets, value):
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            return i
+    return len(buckets)
+
+
+# ============================================
+# ON-DEMAND PROFILER
+# ============================================
+# cProfile only instruments the thread that enables it (here: the one
+# answering the profile request, which just sleeps) and slows every call
+# while on. Instead this samples every thread's stack with
+# sys._current_frames() a few hundred times a second, which costs next to
+# nothing and shows where the worker pool actually spends its time.
+
+PROFILE_MAX_SECONDS = 60
+PROFILE_INTERVAL = 0.005
+
+# Innermost frames of threads that are just waiting (for a request, a
+# socket, the next tick); counted separately so they don't swamp the report
+IDLE_FRAMES = {
+    ("threading.py", "wait"), ("selectors.py", "select"), ("socket.py", "readinto"),
+    ("socketserver.py", "serve_forever"), ("thread.py", "_worker"), ("queue.py", "get"),
+}
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profile is already running in this process"""
+
+
+def sample_profile(seconds, top=25, interval=PROFILE_INTERVAL):
+    """Sample all other threads for `seconds`; returns a plain-text report"""
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        own = threading.get_ident()
+        self_counts = collections.Counter()
+        total_counts = collections.Counter()
+        samples = idle = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    idle += 1
+                    continue
+                samples += 1
+                self_counts[_frame_key(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    key = _frame_key(frame)
+                    if key not in seen:
+                        seen.add(key)
+                        total_counts[key] += 1
+                    frame = frame.f_back
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+
+    lines = [f"# {samples} busy thread samples ({idle} idle) over {seconds:g}s, "
+             f"pid {os.getpid()}, every {interval * 1000:g}ms",
+             f"{'self%':>7} {'total%':>7}  function"]
+    for key, count in self_counts.most_common(top):
+        lines.append(f"{100 * count / max(samples, 1):7.2f} {100 * total_counts[key] / max(samples, 1):7.2f}  {key}")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _frame_key(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
@@ -0,0 +1,88 @@
+import os
+import threading
+
+from snapshots import Snapshot
+
+# ============================================
+# DASHBOARD PAGES WITH INLINED STATS
+# ============================================
+# The dashboards used to paint empty counters until their JS had loaded and
+# made a first API call, and a flash crowd made all those first calls at
+# once. The server now serves these pages from templates kept in memory
+# (re-read when the file changes) with the current tick's payloads inlined
+# before </head>:
+#
+#   <script>window.SANTA_BOOTSTRAP={"stats":{...}};</script>
+#
+# live.js paints from that straight away and connects afterwards. Each page
+# is rendered at most once per tick and shared by every visitor. The payloads
+# are the server's default region; the stream replaces them with the
+# visitor's own once it connects.
+
+PAGE_CHANNELS = {
+    "menu.html": ("stats",),
+    "workshop.html": ("workshop",),
+    "logistics.html": ("santa", "stats"),
+}
+MARKER = b"</head>"
+
+
+class Template:
+    """A page split where the bootstrap script goes"""
+
+    __slots__ = ("mtime", "size", "head", "tail")
+
+    def __init__(self, stat, html):
+        self.mtime = stat.st_mtime
+        self.size = stat.st_size
+        cut = html.find(MARKER)
+        if cut < 0:
+            cut = len(html)     # Nowhere to put it; serve the page as it is
+        self.head = html[:cut]
+        self.tail = html[cut:]
+
+
+class Pages:
+    """Dashboard templates, rendered with the live payloads once per tick"""
+
+    def __init__(self, snapshot_cache, channels=PAGE_CHANNELS):
+        self.snapshot_cache = snapshot_cache
+        self.channels = channels
+        self.templates = {}     # path -> Template
+        self.rendered = {}      # path -> (Template, Snapshot of the page)
+        self.lock = threading.Lock()
+
+    def is_page(self, path):
+        return os.path.basename(path) in self.channels
+
+    def get(self, path):
+        """This tick's page at `path` as a Snapshot (raises OSError if it's missing)"""
+        template = self._template(path)
+        tick = self.snapshot_cache.current_tick()
+        rendered = self.rendered.get(path)
+        if rendered is not None and rendered[0] is template and rendered[1].tick == tick:
+            return rendered[1]
+        with self.lock:
+            rendered = self.rendered.get(path)
+            if rendered is None or rendered[0] is not template or rendered[1].tick != tick:
+                rendered = (template, self._render(path, template, tick))
+                self.rendered[path] = rendered
+        return rendered[1]
+
+    def _template(self, path):
+        stat = os.stat(path)
+        template = self.templates.get(path)
+        if template is None or template.mtime != stat.st_mtime or template.size != stat.st_size:
+            with open(path, "rb") as f:
+                template = Template(os.fstat(f.fileno()), f.read())
+            self.templates[path] = template
+        return template
+
+    def _render(self, path, template, tick):
+        payloads = b",".join(
+            b'"%s":%s' % (channel.encode(), self.snapshot_cache.get(channel).body)
+            for channel in self.channels[os.path.basename(path)]
+        )
+        # "</" inside a string would end the <script> early
+        script = b"<script>window.SANTA_BOOTSTRAP={" + payloads.replace(b"</", b"<\\/") + b"};</script>\n"
+        return Snapshot(tick, None, body=template.head + script + template.tail)
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import time
+
+# ============================================
+# COUNTER PERSISTENCE
+# ============================================
+# The live counters are saved as a small JSON snapshot every few seconds by
+# the ticker that updates them, never by a request. Each save goes to a temp
+# file that is fsync'd and then atomically renamed over the old one, so a
+# crash leaves either the previous or the new snapshot on disk, never a
+# torn file.
+# Restoring on startup is one small read, however long the server has run.
+# Counters are restored as of savedAt: the analytic engine (counters.py)
+# then credits the time the server was down, and the ticker just resumes.
+
+FORMAT_VERSION = 1
+FLUSH_INTERVAL = 5      # Seconds; at most this much progress is lost on a crash
+PERSISTED_FIELDS = ("toysMadeToday", "cookiesEatenToday")
+
+
+class CounterStore:
+    """Periodic atomic snapshots of the live counters"""
+
+    def __init__(self, path, counters, interval=FLUSH_INTERVAL):
+        self.path = path
+        self.counters = counters
+        self.interval = interval
+        self.last_saved = None
+        self.saved_at = None
+        self.last_flush = time.monotonic()
+
+    def load(self):
+        """Saved counters, or None if there's no usable snapshot"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(saved, dict) or saved.get("version") != FORMAT_VERSION:
+            return None     # Missing, or an older stats.json layout
+        values = saved.get("counters") or {}
+        saved_at = saved.get("savedAt")
+        self.saved_at = float(saved_at) if isinstance(saved_at, (int, float)) else None
+        return {name: int(values.get(name, 0)) for name in PERSISTED_FIELDS}
+
+    def restore(self):
+        """Seed the live counters from disk; returns True if anything was restored"""
+        saved = self.load()
+        if saved is None:
+            return False
+        values = self.counters.snapshot()
+        values.update(saved)
+        if self.saved_at is not None:
+            values["lastUpdate"] = self.saved_at    # The time they were current
+        self.counters.write(values)
+        self.last_saved = saved
+        return True
+
+    def save(self):
+        """Write the current counters if they changed since the last save"""
+        values = self.counters.snapshot()
+        current = {name: values[name] for name in PERSISTED_FIELDS}
+        if current == self.last_saved:
+            return False
+
+        payload = json.dumps({
+            "version": FORMAT_VERSION,
+            "savedAt": time.time(),
+            "counters": current,
+        }).encode()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".stats-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._fsync_directory(directory)
+        self.last_saved = current
+        return True
+
+    @staticmethod
+    def _fsync_directory(directory):
+        # Make the rename itself durable
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def maybe_save(self, force=False):
+        """Batched flush, called every tick: writes at most once per interval"""
+        now = time.monotonic()
+        if not force and now - self.last_flush < self.interval:
+            return False
+        self.last_flush = now
+        try:
+            return self.save()
+        except OSError as e:
+            print(f"⚠️  Could not save counters to {self.path}: {e}")
+            return False
@@ -0,0 +1,149 @@
+import json
+import os
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from snapshots import Snapshot
+
+# ============================================
+# CCTV PLAYLIST
+# ============================================
+# config.json lists the CCTV feeds: local clips in media/ and at most one
+# YouTube live stream. Rather than every visitor fetching it with a
+# cache-buster and discovering missing clips by failing to play them, the
+# server loads it once, checks each local clip on disk (size, duration from
+# the MP4 header) and serves the result as an ETagged snapshot:
+#
+#   {"live": {"url": ..., "youtubeId": "s_zSsgOY10o"},
+#    "files": [{"name": "a1.mp4", "url": "media/a1.mp4", "bytes": 135883, "duration": 10.0}],
+#    "missing": ["cctv_stables.mp4"]}
+#
+# The config file, the media directory and every listed clip are stat()ed at
+# most once per CHECK_SECONDS; the playlist is rebuilt only if one of them
+# changed. A config.json that fails to parse keeps the last good playlist.
+
+CONFIG_FILE = 'config.json'
+MEDIA_DIR = 'media'
+MEDIA_URL = 'media/'        # Where pages load the clips from
+CHECK_SECONDS = 2
+YOUTUBE_HOSTS = ("youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be")
+
+
+def youtube_id(url):
+    """Video ID from a youtube.com/watch?v= or youtu.be/ URL, or None"""
+    parts = urlsplit(url)
+    if parts.hostname not in YOUTUBE_HOSTS:
+        return None
+    if parts.hostname == "youtu.be":
+        return parts.path.strip("/") or None
+    return parse_qs(parts.query).get("v", [None])[0]
+
+
+def mp4_duration(path):
+    """Seconds from the movie header (moov/mvhd), or None if it can't be read"""
+    try:
+        with open(path, "rb") as f:
+            moov = _find_box(f, b"moov", os.fstat(f.fileno()).st_size)
+            if moov is None:
+                return None
+            mvhd = _find_box(f, b"mvhd", moov)
+            if mvhd is None:
+                return None
+            version = f.read(4)[0]
+            if version == 1:
+                timescale, duration = struct.unpack(">16xIQ", f.read(28))
+            else:
+                timescale, duration = struct.unpack(">8xII", f.read(16))
+    except (OSError, struct.error, IndexError):
+        return None
+    return round(duration / timescale, 3) if timescale else None
+
+
+def _find_box(f, kind, end):
+    """Seek past the header of the next `kind` box before `end`; returns the box's end"""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, found = struct.unpack(">I4s", f.read(8))
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+        elif size == 0:
+            size = end - start     # Runs to the end of its parent
+        if size < 8:
+            return None
+        if found == kind:
+            return start + size
+        f.seek(start + size)
+    return None
+
+
+class Playlist:
+    """config.json checked against the media directory, rebuilt when either changes"""
+
+    def __init__(self, config_path=CONFIG_FILE, media_dir=MEDIA_DIR, check_seconds=CHECK_SECONDS):
+        self.config_path = config_path
+        self.media_dir = media_dir
+        self.check_seconds = check_seconds
+        self.lock = threading.Lock()
+        self.entries = []           # From the last good config.json
+        self.signature = None
+        self.checked = float("-inf")
+        self.version = 0
+        self.snapshot = None
+
+    def get(self):
+        """The current playlist snapshot"""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.checked >= self.check_seconds:
+                self.checked = now
+                signature = self._signature()
+                if signature != self.signature:
+                    self.signature = signature
+                    self._reload()
+            return self.snapshot
+
+    def _stat(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _signature(self):
+        return (self._stat(self.config_path), self._stat(self.media_dir),
+                tuple(self._stat(os.path.join(self.media_dir, name))
+                      for name in self.entries if youtube_id(name) is None))
+
+    def _reload(self):
+        try:
+            with open(self.config_path, encoding="utf-8") as f:
+                files = json.load(f).get("files", [])
+            if not isinstance(files, list):
+                raise ValueError('"files" must be a list')
+            self.entries = [name for name in files if isinstance(name, str)]
+        except FileNotFoundError:
+            self.entries = []
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️  Keeping the previous CCTV playlist, {self.config_path} is invalid: {e}")
+        self.signature = self._signature()      # Now covering the clips just listed
+
+        live, files, missing = None, [], []
+        for name in self.entries:
+            video = youtube_id(name)
+            if video is not None:
+                live = live or {"url": name, "youtubeId": video}
+                continue
+            path = os.path.join(self.media_dir, name)
+            if os.path.basename(name) != name or not os.path.isfile(path):
+                missing.append(name)
+                continue
+            files.append({
+                "name": name,
+                "url": MEDIA_URL + name,
+                "bytes": os.path.getsize(path),
+                "duration": mp4_duration(path),
+            })
+        self.version += 1
+        self.snapshot = Snapshot(self.version, {"live": live, "files": files, "missing": missing})
@@ -0,0 +1,324 @@
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+except ImportError:     # Falls back to one scalar calculation per point
+    np = None
+
+from snapshots import Snapshot
+
+# ============================================
+# SEASON CURVE / FORECAST SERIES
+# ============================================
+# calculate_progress_stats() answers "what are the stats right now". For the
+# dashboard charts we need the same numbers for thousands of timestamps at
+# once (the whole of December, or a forecast of tonight's flight), so this
+# module re-expresses every phase formula as array maths over a column of
+# timestamps: one NumPy pass per metric instead of one Python call per point.
+#
+# The output is column-oriented, ready to feed a chart:
+#   {"t": [epoch seconds...], "phase": [...], "toysMade": [...], ...}
+# Metrics that don't exist in a phase (e.g. presentsDelivered before the
+# flight) are null at those points.
+#
+# Encoded responses are kept by (from, to, step) in SeriesCache, bounded by
+# bytes: a MAX_POINTS series is about 14 MB of JSON.
+
+MAX_POINTS = 100_000
+MIN_STEP = 1
+CACHE_MAX_BYTES = int(os.environ.get('SANTA_SERIES_CACHE_MB', 64)) * 1024 * 1024
+
+PHASES = ("pre_season", "production", "final_prep", "delivering", "christmas_day", "post_christmas")
+DAY = 86400
+ROUNDED = ("progress", "hoursUntilDeparture")     # Reported to one decimal place
+
+
+class SeriesError(ValueError):
+    """Bad from/to/step for a series request"""
+
+
+def parse_time(value, default):
+    """ISO-8601 (local unless it has an offset) or epoch seconds -> naive local datetime"""
+    if value is None or value == "":
+        return default
+    try:
+        return datetime.fromtimestamp(float(value))
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise SeriesError(f"Can't parse time {value!r}") from None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)   # The timeline is naive local time
+    return moment
+
+
+class SeasonSeries:
+    """Evaluates the season's stats over many timestamps at once"""
+
+    def __init__(self, timeline, targets, start_values, get_route, calculate):
+        """
+        timeline:     dict of the START_DATE..POST_CHRISTMAS boundaries
+        targets:      CHRISTMAS_TARGETS
+        start_values: START_VALUES
+        get_route:    returns the RouteIndex (for distanceFlown)
+        calculate:    calculate_progress_stats, used when NumPy is missing
+        """
+        self.timeline = timeline
+        self.targets = targets
+        self.start_values = start_values
+        self.get_route = get_route
+        self.calculate = calculate
+
+        # Seconds from START_DATE to each boundary
+        start = timeline["START_DATE"]
+        self.offsets = {name: (value - start).total_seconds() for name, value in timeline.items()}
+
+        # The scalar code's per-second "live" variance only depends on
+        # (second of the minute, key), so it's a 60-row lookup table
+        self.variance = {
+            key: [1 + (hash(str(second) + key) % 100 - 50) / 5000 for second in range(60)]
+            for key in targets
+        }
+
+    # --------------------------------------------
+    # Public entry point
+    # --------------------------------------------
+
+    def compute(self, start, end, step):
+        """Series for start..end (inclusive) every `step` seconds"""
+        if step < MIN_STEP:
+            raise SeriesError(f"step must be at least {MIN_STEP} second(s)")
+        if end < start:
+            raise SeriesError("'to' is before 'from'")
+        count = int((end - start).total_seconds() // step) + 1
+        if count > MAX_POINTS:
+            raise SeriesError(f"{count} points requested; the limit is {MAX_POINTS} (raise step)")
+
+        if np is None:
+            return self._compute_scalar(start, count, step)
+        return self._compute_vector(start, count, step)
+
+    # --------------------------------------------
+    # Fallback: the scalar calculator per point
+    # --------------------------------------------
+
+    def _compute_scalar(self, start, count, step):
+        columns = {"t": [], "phase": []}
+        rows = []
+        for i in range(count):
+            now = start + timedelta(seconds=i * step)
+            columns["t"].append(int(now.timestamp()))
+            rows.append(self.calculate(now))
+
+        numeric = sorted({key for row in rows for key, value in row.items()
+                          if isinstance(value, (int, float)) and not isinstance(value, bool)})
+        columns["phase"] = [row["phase"] for row in rows]
+        for key in numeric:
+            columns[key] = [row.get(key) for row in rows]
+        return columns
+
+    # --------------------------------------------
+    # Vectorized: every phase formula as array maths
+    # --------------------------------------------
+
+    def _compute_vector(self, start, count, step):
+        o = self.offsets
+        rel = (start - self.timeline["START_DATE"]).total_seconds() + np.arange(count, dtype=np.float64) * step
+
+        phase = np.select(
+            [rel < o["START_DATE"], rel < o["CHRISTMAS_EVE"], rel < o["SANTA_DEPARTS"],
+             rel < o["SANTA_RETURNS"], rel < o["POST_CHRISTMAS"]],
+            [0, 1, 2, 3, 4], default=5,
+        )
+        masks = [phase == i for i in range(len(PHASES))]
+        pre, production, final_prep, delivering, christmas_day, post = masks
+
+        out = {}
+
+        def column(name):
+            if name not in out:
+                out[name] = np.full(count, np.nan)
+            return out[name]
+
+        # Countdown (same truncation / modulo quirks as the scalar code)
+        until = o["CHRISTMAS_DAY"] - rel
+        out["daysUntilChristmas"] = np.maximum(0, np.floor(until / DAY))
+        out["hoursUntilChristmas"] = np.maximum(0, np.trunc(until / 3600))
+        out["minutesUntilChristmas"] = np.maximum(0, np.mod(np.trunc(until / 60), 60))
+        out["secondsUntilChristmas"] = np.maximum(0, np.mod(np.trunc(until), 60))
+        days_remaining = out["daysUntilChristmas"]
+
+        # pre_season: half of the starting values, skeleton crew
+        for key in self.targets:
+            column(key)[pre] = math.trunc(self.start_values.get(key, 0) * 0.5)
+        column("progress")[pre] = 0
+        column("elvesWorking")[pre] = 100_000
+
+        # production: eased ramp from START_VALUES to the targets
+        if production.any():
+            r = rel[production]
+            progress = np.minimum(1.0, r / o["CHRISTMAS_EVE"])
+            eased = 1 - (1 - progress) ** 2
+            seconds = np.mod(np.floor(r), 60).astype(np.int64)
+            for key, target in self.targets.items():
+                begin = self.start_values.get(key, 0)
+                variance = np.asarray(self.variance[key])[seconds]
+                current = np.trunc(begin + (target - begin) * eased * variance)
+                column(key)[production] = np.minimum(current, target)
+
+            days_elapsed = np.floor(r / DAY)
+            column("reindeerReady")[production] = np.minimum(9, np.maximum(0, np.trunc(days_elapsed / 2.5)))
+
+            remaining = days_remaining[production]
+            loading = remaining <= 3
+            capacity = np.where(loading, np.trunc((3 - remaining) / 3 * 100), 0)
+            column("sleighCapacity")[production] = capacity
+            column("presentsLoaded")[production] = np.where(
+                loading, np.trunc(column("presentsWrapped")[production] * capacity / 100), 0)
+            column("progress")[production] = eased * 100
+
+        # final_prep: everything at target, counting down to departure
+        for key, target in self.targets.items():
+            column(key)[final_prep | delivering | christmas_day] = target
+        column("hoursUntilDeparture")[final_prep] = np.maximum(0, (o["SANTA_DEPARTS"] - rel[final_prep]) / 3600)
+        column("progress")[final_prep] = 100
+        column("sleighCapacity")[final_prep] = 100
+        column("presentsLoaded")[final_prep] = self.targets["presentsWrapped"]
+
+        # delivering: everything scales with flight progress
+        if delivering.any():
+            r = rel[delivering]
+            first_half = (r - o["SANTA_DEPARTS"]) / (o["CHRISTMAS_DAY"] - o["SANTA_DEPARTS"])
+            second_half = 0.5 + (r - o["CHRISTMAS_DAY"]) / (o["SANTA_RETURNS"] - o["CHRISTMAS_DAY"]) * 0.5
+            flight = np.clip(np.where(r < o["CHRISTMAS_DAY"], first_half, second_half), 0, 1)
+
+            total_presents = self.targets["presentsWrapped"]
+            delivered = np.trunc(total_presents * flight)
+            cookies = np.trunc(self.targets["cookiesPrepared"] * flight * 0.9)
+            column("presentsDelivered")[delivering] = delivered
+            column("presentsRemaining")[delivering] = total_presents - delivered
+            column("sleighCapacity")[delivering] = np.trunc(100 * (1 - flight))
+            column("cookiesEaten")[delivering] = cookies
+            column("milkDrunk")[delivering] = np.trunc(cookies * 0.2)
+            column("carrotsEaten")[delivering] = np.trunc(flight * 800_000_000 * 9)
+            column("homesVisited")[delivering] = np.trunc(flight * 500_000_000)
+            column("progress")[delivering] = flight * 100
+
+            # Distance follows the route schedule (linear between stops)
+            route = self.get_route()
+            window = o["SANTA_RETURNS"] - o["SANTA_DEPARTS"]
+            elapsed = np.clip(r - o["SANTA_DEPARTS"], 0, window) / window * route.duration
+            stops = np.frombuffer(route.seconds, dtype=np.float64)
+            km = np.frombuffer(route.cumulative_km, dtype=np.float64)
+            column("distanceFlown")[delivering] = np.trunc(np.interp(elapsed, stops, km))
+
+        # christmas_day: mission complete
+        route_km = math.trunc(self.get_route().total_km)
+        cookies_eaten = math.trunc(self.targets["cookiesPrepared"] * 0.9)
+        column("presentsDelivered")[christmas_day] = self.targets["presentsWrapped"]
+        column("presentsRemaining")[christmas_day] = 0
+        column("cookiesEaten")[christmas_day] = cookies_eaten
+        column("milkDrunk")[christmas_day] = math.trunc(cookies_eaten * 0.2)
+        column("carrotsEaten")[christmas_day] = 800_000_000 * 9
+        column("distanceFlown")[christmas_day] = route_km
+        column("homesVisited")[christmas_day] = 500_000_000
+        column("sleighCapacity")[christmas_day] = 0
+        column("progress")[christmas_day] = 100
+        column("elvesWorking")[christmas_day] = 50_000
+
+        # post_christmas: winding down over a week
+        if post.any():
+            days_after = np.floor((rel[post] - o["POST_CHRISTMAS"]) / DAY)
+            wind_down = np.maximum(0, 1 - days_after / 7)
+            for key in ("toysMade", "presentsWrapped", "presentsLoaded", "reindeerReady",
+                        "sleighCapacity", "routeCalculated"):
+                column(key)[post] = 0
+            column("presentsDelivered")[post] = np.trunc(self.targets["presentsWrapped"] * wind_down)
+            column("cookiesEaten")[post] = cookies_eaten
+            column("elvesWorking")[post] = np.trunc(100_000 * wind_down)
+            column("niceListRatio")[post] = 50
+            column("cocoaReserves")[post] = np.trunc(20_000 * wind_down)
+            column("magicDustLevel")[post] = np.trunc(30 * wind_down)
+            column("progress")[post] = 100
+
+        epoch = start.timestamp() + np.arange(count, dtype=np.float64) * step
+        columns = {
+            "t": np.floor(epoch).astype(np.int64).tolist(),
+            "phase": np.asarray(PHASES, dtype=object)[phase].tolist(),
+        }
+        for key in sorted(out):
+            columns[key] = self._to_list(key, out[key])
+        return columns
+
+    @staticmethod
+    def _to_list(key, values):
+        """JSON-friendly list: ints where the metric is integral, null where missing"""
+        missing = np.isnan(values)
+        if key in ROUNDED:
+            # Python's round() (exact decimal) so values match the scalar code
+            result = [round(value, 1) for value in values.tolist()]
+        else:
+            result = np.where(missing, 0, values).astype(np.int64).tolist()
+        if missing.any():
+            for i in np.flatnonzero(missing).tolist():
+                result[i] = None
+        return result
+
+
+class SeriesCache:
+    """LRU of encoded series, bounded by total size (the curve never changes)"""
+
+    def __init__(self, series, max_bytes=CACHE_MAX_BYTES):
+        self.series = series
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # (start, end, step) -> Snapshot
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def peek(self, start, end, step):
+        """The cached snapshot, or None; never computes"""
+        key = (start, end, step)
+        with self.lock:
+            snapshot = self.entries.get(key)
+            if snapshot is not None:
+                self.entries.move_to_end(key)
+            return snapshot
+
+    def get(self, start, end, step):
+        """Snapshot of the series for start..end every `step` seconds"""
+        snapshot = self.peek(start, end, step)
+        if snapshot is not None:
+            return snapshot
+
+        key = (start, end, step)
+        # Keep only the bytes; the decoded columns are several times bigger
+        snapshot = Snapshot(0, None, body=json.dumps({
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "step": step,
+            "series": self.series.compute(start, end, step),
+        }, separators=(",", ":")).encode())
+        size = self._size(snapshot)
+        if size > self.max_bytes:
+            return snapshot
+        with self.lock:
+            if key in self.entries:
+                self._evict(key)
+            self.entries[key] = snapshot
+            self.total += size
+            while self.total > self.max_bytes:
+                self._evict(next(iter(self.entries)))
+        return snapshot
+
+    def _size(self, snapshot):
+        return len(snapshot.body) + len(snapshot.gzip_body or b"")
+
+    def _evict(self, key):
+        self.total -= self._size(self.entries.pop(key))
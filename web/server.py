@@ -1,14 +1,64 @@
+import functools
+import hmac
 import http.server
-import socketserver
 import json
+import math
 import os
 import time
 import threading
 import random
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit, parse_qs
 
-PORT = 8001
-DATA_FILE = 'stats.json'
+from admission import InFlight, TokenBuckets, client_key
+from clock import Clock, at_offset, parse_offset
+from counters import AnalyticCounters, SharedCounters
+from history import History, HistoryError
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ROUTES as METRIC_ROUTES, Metrics, ProfilerBusy, sample_profile
+from pages import Pages
+from persistence import CounterStore
+from playlist import Playlist
+from route import RouteIndex
+from series import SeasonSeries, SeriesCache, parse_time
+from snapshots import Snapshot, SnapshotCache, accepts_gzip
+from static_files import HASHED_NAME, IMMUTABLE, RangeNotSatisfiable, StaticCache, parse_range
+from stream import StreamHub, parse_channels
+
+PORT = int(os.environ.get('SANTA_PORT', 8001))
+DATA_FILE = os.environ.get('SANTA_DATA_FILE', 'stats.json')
+ROUTE_FILE = 'route.csv'
+
+# ============================================
+# SERVING ENGINE
+# ============================================
+# "threaded": bounded worker pool, HTTP/1.1 keep-alive (default)
+# "single":   one request at a time, like the original TCPServer
+ENGINE = os.environ.get('SANTA_ENGINE', 'threaded')
+WORKER_THREADS = int(os.environ.get('SANTA_THREADS', 64))
+PROCESSES = int(os.environ.get('SANTA_PROCESSES', 1))   # >1: pre-forked workers
+# API requests a process handles at once before it serves stale snapshots
+MAX_IN_FLIGHT = int(os.environ.get('SANTA_MAX_IN_FLIGHT', WORKER_THREADS * 3 // 4))
+KEEPALIVE_TIMEOUT = 5      # Seconds an idle keep-alive connection may hold a worker
+LISTEN_BACKLOG = 1024
+ACCESS_LOG = os.environ.get('SANTA_ACCESS_LOG', '1') != '0'
+PROFILE_TOKEN = os.environ.get('SANTA_PROFILE_TOKEN')   # Enables /api/metrics/profile
+
+# "ticker":   a background loop adds random increments every second (default)
+# "analytic": counters are derived on read from elapsed time; no per-second work
+COUNTER_ENGINE = os.environ.get('SANTA_COUNTERS', 'ticker')
+COUNTER_SEED = int(os.environ.get('SANTA_COUNTER_SEED', 2025))
+
+# Request, latency and tick metrics for /api/metrics, shared by every worker.
+# One slot per pre-forked worker and one for the parent's ticker
+metrics = Metrics(slots=max(PROCESSES, 1) + 1)
+
+# Server time: the wall clock, or SANTA_REPLAY=START/END/SECONDS to play a
+# slice of the timeline back faster (e.g. the delivery night in 10 minutes)
+clock = Clock.from_spec(os.environ.get('SANTA_REPLAY'))
+TIME_TRAVEL_CACHE = 4096    # ?at= snapshots kept, one per (endpoint, second)
 
 # ============================================
 # CHRISTMAS 2025 TIMELINE
@@ -57,10 +107,16 @@ START_VALUES = {
     "routeCalculated": 0,
 }
 
+# Live counter increments per second: (low, high) in each phase they grow in
+COUNTER_RATES = {
+    "production": {"toysMadeToday": (1000, 1500), "cookiesEatenToday": (1, 5)},
+    "delivering": {"cookiesEatenToday": (50, 200)},  # Cookies being eaten during delivery
+}
+
 def get_christmas_phase(now=None):
     """Determine which phase of Christmas we're in"""
     if now is None:
-        now = datetime.now()
+        now = clock.now()
     
     if now < START_DATE:
         return "pre_season"
@@ -77,9 +133,33 @@ def get_christmas_phase(now=None):
     else:
         return "post_christmas"   # Dec 26+: Rest & celebration
 
-def calculate_progress_stats():
+@functools.lru_cache(maxsize=1)
+def get_route():
+    """Santa's stop table, loaded once (falls back to the built-in stops)"""
+    try:
+        return RouteIndex.load(ROUTE_FILE)
+    except FileNotFoundError:
+        return RouteIndex.default()
+
+def get_flight_seconds(now):
+    """Seconds since Santa departed, clamped to the flight window"""
+    flight_window = (SANTA_RETURNS - SANTA_DEPARTS).total_seconds()
+    return min(flight_window, max(0.0, (now - SANTA_DEPARTS).total_seconds()))
+
+def route_elapsed(now):
+    """Map the flight window onto the route's own schedule"""
+    route = get_route()
+    flight_window = (SANTA_RETURNS - SANTA_DEPARTS).total_seconds()
+    return get_flight_seconds(now) / flight_window * route.duration
+
+def locate_santa(now):
+    return get_route().locate(route_elapsed(now))
+
+@metrics.timed("calculate_progress_stats")
+def calculate_progress_stats(now=None):
     """Calculate stats based on progress toward Christmas"""
-    now = datetime.now()
+    if now is None:
+        now = clock.now()
     phase = get_christmas_phase(now)
     
     # Time calculations
@@ -189,8 +269,8 @@ def calculate_progress_stats():
         # Carrots for reindeer
         stats["carrotsEaten"] = int(flight_progress * 800_000_000 * 9)  # Reindeer snacks
         
-        # Distance flown (Earth circumference is ~40,000 km, Santa flies ~500 million km)
-        stats["distanceFlown"] = int(flight_progress * 500_000_000)
+        # Distance flown along the planned route
+        stats["distanceFlown"] = int(locate_santa(now).distance_km)
         
         # Homes visited
         stats["homesVisited"] = int(flight_progress * 500_000_000)  # 500M homes
@@ -209,7 +289,7 @@ def calculate_progress_stats():
         stats["cookiesEaten"] = int(CHRISTMAS_TARGETS["cookiesPrepared"] * 0.9)
         stats["milkDrunk"] = int(stats["cookiesEaten"] * 0.2)
         stats["carrotsEaten"] = 800_000_000 * 9
-        stats["distanceFlown"] = 500_000_000
+        stats["distanceFlown"] = int(get_route().total_km)
         stats["homesVisited"] = 500_000_000
         stats["sleighCapacity"] = 0  # Empty!
         stats["progress"] = 100
@@ -238,201 +318,983 @@ def calculate_progress_stats():
     
     return stats
 
-# Live-updating incremental stats (for per-second updates)
-incremental_stats = {
-    "toysMadeToday": 0,
-    "cookiesEatenToday": 0,
-    "lastUpdate": time.time()
-}
+# Live-updating incremental stats (for per-second updates).
+# Shared memory, so every pre-forked worker reports the same numbers.
+if COUNTER_ENGINE == 'analytic':
+    incremental_stats = AnalyticCounters(
+        COUNTER_RATES,
+        windows={
+            "production": (START_DATE.timestamp(), CHRISTMAS_EVE.timestamp()),
+            "delivering": (SANTA_DEPARTS.timestamp(), SANTA_RETURNS.timestamp()),
+        },
+        seed=COUNTER_SEED,
+    )
+elif COUNTER_ENGINE == 'ticker':
+    incremental_stats = SharedCounters(lastUpdate=time.time())
+else:
+    raise ValueError(f"Unknown SANTA_COUNTERS {COUNTER_ENGINE!r} (expected 'ticker' or 'analytic')")
+
+# Survives restarts: the ticker snapshots the counters to DATA_FILE
+counter_store = CounterStore(DATA_FILE, incremental_stats)
+
+def simulation_loop(stop_event, between_ticks=None):
+    """Background loop for per-second increments (one ticker per server).
+    `between_ticks` is called once a tick while no tick work is in progress."""
+    if counter_store.restore():
+        print(f"💾 Restored counters from {DATA_FILE}")
+    if COUNTER_ENGINE == 'analytic':
+        # Nothing to tick: the counters follow from their saved starting point
+        # and the clock, so one save here is all a restart needs
+        counter_store.maybe_save(force=True)
+        while not stop_event.wait(1):
+            record_history()
+            if between_ticks:
+                between_ticks()
+        return
+    try:
+        run_ticks(stop_event, between_ticks)
+    finally:
+        counter_store.maybe_save(force=True)
+
+def run_ticks(stop_event, between_ticks=None):
+    last_tick = None
+    while not stop_event.is_set():
+        # Anything past 1s since the last tick is lag (slow work or a late wakeup)
+        started = time.monotonic()
+        if last_tick is not None:
+            metrics.observe_tick(max(0.0, started - last_tick - 1))
+        last_tick = started
+        
+        values = incremental_stats.snapshot()
+        
+        # Small random increments, only while the workshop or sleigh is busy
+        for name, (low, high) in COUNTER_RATES.get(get_christmas_phase(), {}).items():
+            values[name] += random.randint(low, high)
+        
+        values["lastUpdate"] = time.time()
+        incremental_stats.write(values)
+        counter_store.maybe_save()
+        record_history()
+        if between_ticks:
+            between_ticks()
+        stop_event.wait(1)
 
-def simulation_loop():
-    """Background loop for per-second increments"""
-    while True:
-        phase = get_christmas_phase()
+def record_history():
+    """Keep what /api/stats serves this tick, for /api/stats/history"""
+    stats_history.record(snapshot_cache.get("stats").data)
+
+# ============================================
+# API PAYLOADS
+# ============================================
+
+def build_stats_payload(now=None, stats=None):
+    """Progress stats combined with the live incremental counters"""
+    if stats is None:
+        stats = calculate_progress_stats(now)
+    return {**stats, **incremental_stats.snapshot()}
+
+def build_workshop_payload(now=None, stats=None):
+    """Detailed workshop stats"""
+    if now is None:
+        now = clock.now()
+    if stats is None:
+        stats = calculate_progress_stats(now)
+    phase = stats.get("phase", "production")
+    
+    # Shift based on time of day
+    hour = now.hour
+    if hour < 6:
+        shift = "OVERNIGHT"
+    elif hour < 12:
+        shift = "MORNING"
+    elif hour < 18:
+        shift = "AFTERNOON"
+    else:
+        shift = "EVENING"
+    
+    # Sector rotation
+    sector = f"Sector {(hour % 7) + 1}"
+    
+    # Workshop status messages
+    if phase == "delivering":
+        workshop_status = "SANTA IS FLYING!"
+        elf_morale = "CHEERING"
+    elif phase == "christmas_day":
+        workshop_status = "MERRY CHRISTMAS!"
+        elf_morale = "CELEBRATING"
+    elif phase == "final_prep":
+        workshop_status = "FINAL CHECKS"
+        elf_morale = "EXCITED"
+    elif phase == "post_christmas":
+        workshop_status = "VACATION MODE"
+        elf_morale = "RELAXED"
+    else:
+        # Regular production
+        progress = stats.get("progress", 0)
+        if progress > 90:
+            workshop_status = "CRUNCH TIME"
+            elf_morale = "FOCUSED"
+        elif progress > 70:
+            workshop_status = "HIGH GEAR"
+            elf_morale = "ENERGETIC"
+        elif progress > 50:
+            workshop_status = "ON TRACK"
+            elf_morale = "HAPPY"
+        else:
+            workshop_status = "RAMPING UP"
+            elf_morale = "CHEERFUL"
+    
+    return {
+        **stats,
+        "activeShift": shift,
+        "activeSector": sector,
+        "workshopStatus": workshop_status,
+        "wrappingPaperStatus": "LOW" if stats.get("progress", 0) > 95 else "OPTIMAL",
+        "elfMorale": elf_morale,
+        "productionRate": f"{100 + int(stats.get('progress', 0) / 10)}%" if phase == "production" else "N/A"
+    }
+
+def build_santa_payload(now=None, stats=None):
+    """Santa tracking data (for logistics page)"""
+    if now is None:
+        now = clock.now()
+    if stats is None:
+        stats = calculate_progress_stats(now)
+    phase = stats.get("phase", "production")
+    
+    if phase == "delivering":
+        # Santa is flying! Interpolate his position along the route
+        route = get_route()
+        position = locate_santa(now)
+        current = position.index
+        upcoming = current + 1
         
-        # Only increment during production phase
-        if phase == "production":
-            # Add small random increments every second
-            incremental_stats["toysMadeToday"] += random.randint(1000, 1500)
-            incremental_stats["cookiesEatenToday"] += random.randint(1, 5)
-        elif phase == "delivering":
-            # Cookies being eaten during delivery
-            incremental_stats["cookiesEatenToday"] += random.randint(50, 200)
+        # Route schedule -> wall clock
+        time_scale = (SANTA_RETURNS - SANTA_DEPARTS).total_seconds() / route.duration
+        arrival = SANTA_DEPARTS + timedelta(seconds=route.seconds[upcoming] * time_scale)
         
-        incremental_stats["lastUpdate"] = time.time()
-        time.sleep(1)
+        return {
+            "location": route.cities[current],
+            "country": route.regions[current],
+            "region": route.regions[current],
+            "lat": round(position.lat, 4),
+            "lng": round(position.lng, 4),
+            "next": {
+                "city": route.cities[upcoming],
+                "region": route.regions[upcoming],
+                "arrival": arrival.isoformat()
+            },
+            "presentsDelivered": stats.get("presentsDelivered", 0),
+            "distance": int(position.distance_km * 1000),  # Convert to meters
+            "status": "FLYING",
+            "speed": f"{round(position.speed_kmh / time_scale)} km/h"
+        }
+    elif phase == "christmas_day":
+        return {
+            "location": "North Pole",
+            "country": "Home Sweet Home",
+            "region": "Workshop",
+            "presentsDelivered": stats.get("presentsDelivered", CHRISTMAS_TARGETS["presentsWrapped"]),
+            "distance": int(get_route().total_km * 1000),  # Full trip in meters
+            "status": "MISSION COMPLETE",
+            "next": None
+        }
+    else:
+        # Pre-flight - Santa at North Pole preparing
+        hours_until = stats.get("hoursUntilChristmas", 0)
+        return {
+            "location": "North Pole",
+            "country": "Workshop",
+            "region": "Command Center",
+            "presentsDelivered": 0,
+            "distance": 0,
+            "status": "PREPARING" if phase == "final_prep" else "AT WORKSHOP",
+            "next": None,
+            "message": f"Santa departs in approximately {hours_until} hours!" if hours_until > 0 else "Standby..."
+        }
 
-# Start simulation
-threading.Thread(target=simulation_loop, daemon=True).start()
+def regional(builder):
+    """Builder that takes an optional UTC offset (minutes east) for the visitor's region"""
+    def build(offset=None):
+        return builder(None if offset is None else at_offset(clock.now(), offset))
+    return build
+
+# Each payload is built once per tick (per offset bucket), no matter how many clients poll
+snapshot_cache = SnapshotCache({
+    "stats": regional(build_stats_payload),
+    "workshop": regional(build_workshop_payload),
+    "santa": regional(build_santa_payload),
+})
+
+# Whole-season curves for the dashboard charts (vectorized when NumPy is there)
+season_series = SeasonSeries(
+    timeline={
+        "START_DATE": START_DATE,
+        "CHRISTMAS_EVE": CHRISTMAS_EVE,
+        "SANTA_DEPARTS": SANTA_DEPARTS,
+        "CHRISTMAS_DAY": CHRISTMAS_DAY,
+        "SANTA_RETURNS": SANTA_RETURNS,
+        "POST_CHRISTMAS": POST_CHRISTMAS,
+    },
+    targets=CHRISTMAS_TARGETS,
+    start_values=START_VALUES,
+    get_route=get_route,
+    calculate=calculate_progress_stats,
+)
+
+series_cache = SeriesCache(season_series)
+
+# ?at= time travel: what each endpoint says at a given second. Pure functions
+# of the timestamp (the live counters describe the running server, not the
+# timeline, so they're left out), so each answer is cached for good.
+TIME_TRAVEL_BUILDERS = {
+    "stats": calculate_progress_stats,
+    "workshop": build_workshop_payload,
+    "santa": build_santa_payload,
+}
+
+@functools.lru_cache(maxsize=TIME_TRAVEL_CACHE)
+def get_snapshot_at(name, second, offset=None):
+    """Encoded payload for `name` at one epoch second (in a region, given an offset)"""
+    now = datetime.fromtimestamp(second) if offset is None else at_offset(second, offset)
+    return Snapshot(second, TIME_TRAVEL_BUILDERS[name](now))
+
+# /api/bundle: several resources in one response, optionally cut down to
+# the fields a page reads. One stats calculation feeds every resource.
+BUNDLE_RESOURCES = {
+    "stats": build_stats_payload,
+    "workshop": build_workshop_payload,
+    "santa": build_santa_payload,
+}
+BUNDLE_CACHE = 256          # Distinct parameter sets kept per tick
+MAX_BUNDLE_FIELDS = 64
+
+def parse_bundle_query(include, fields):
+    """?include=&fields= -> normalized (resources, fields) tuples, for the cache key"""
+    names = sorted({name.strip() for name in (include or ",".join(BUNDLE_RESOURCES)).split(",")} - {""})
+    unknown = [name for name in names if name not in BUNDLE_RESOURCES]
+    if unknown or not names:
+        raise ValueError(f"include must be some of {', '.join(BUNDLE_RESOURCES)}")
+    wanted = sorted({field.strip() for field in (fields or "").split(",")} - {""})
+    if len(wanted) > MAX_BUNDLE_FIELDS:
+        raise ValueError(f"At most {MAX_BUNDLE_FIELDS} fields")
+    return tuple(names), tuple(wanted)
+
+def select_fields(name, payload, fields):
+    """Keep `field` (any resource) and `name.field` entries; everything if no fields"""
+    if not fields:
+        return payload
+    prefix = name + "."
+    keys = [field[len(prefix):] if field.startswith(prefix) else field
+            for field in fields if "." not in field or field.startswith(prefix)]
+    return {key: payload[key] for key in keys if key in payload}
+
+def build_bundle(variant):
+    include, fields, offset, second = variant
+    if second is None:
+        now = clock.now() if offset is None else at_offset(clock.now(), offset)
+    else:
+        now = datetime.fromtimestamp(second) if offset is None else at_offset(second, offset)
+    stats = calculate_progress_stats(now)
+    
+    bundle = {}
+    for name in include:
+        if name == "stats" and second is not None:
+            payload = stats     # Time travel leaves out the live counters, as with ?at=
+        else:
+            payload = BUNDLE_RESOURCES[name](now, stats=stats)
+        bundle[name] = select_fields(name, payload, fields)
+    return bundle
+
+bundle_cache = SnapshotCache({"bundle": build_bundle}, max_entries=BUNDLE_CACHE)
+
+# /api/stats/history: what the ticker recorded (history.py), as min/max/avg
+# buckets for sparklines. Shared memory, written by the ticker process only.
+HISTORY_FIELDS = tuple(dict.fromkeys((
+    *CHRISTMAS_TARGETS, "progress", "presentsDelivered", "presentsRemaining", "cookiesEaten",
+    "milkDrunk", "carrotsEaten", "distanceFlown", "homesVisited",
+    *(name for rates in COUNTER_RATES.values() for name in rates),
+)))
+HISTORY_CACHE = 64          # Distinct queries kept per tick
+stats_history = History(HISTORY_FIELDS)
+
+def build_history(variant):
+    window, resolution, fields = variant
+    return stats_history.query(window, resolution, fields)
+
+history_cache = SnapshotCache({"history": build_history}, max_entries=HISTORY_CACHE)
+
+# Pushes every tick's snapshots to /api/stream subscribers
+stream_hub = StreamHub(snapshot_cache)
+
+# CCTV feeds from config.json, checked against media/ and reloaded on change
+cctv_playlist = Playlist()
+
+# Admission control: per-client rate limits and the in-flight cap (admission.py)
+rate_limits = TokenBuckets()
+in_flight = InFlight(MAX_IN_FLIGHT)
+
+# menu/workshop/logistics.html with this tick's payloads inlined (pages.py)
+dashboard_pages = Pages(snapshot_cache)
+
+# Small hot static files, kept in memory (large ones go out with sendfile)
+static_cache = StaticCache()
+
+def metric_route(path):
+    """Route label for /api/metrics (a fixed set, so labels can't explode)"""
+    route = urlsplit(path).path
+    if route.startswith('/api/metrics'):
+        return '/api/metrics'
+    if route in METRIC_ROUTES:
+        return route
+    return 'api_other' if route.startswith('/api/') else 'static'
+
+class BadQuery(ValueError):
+    """A query parameter that can't be used; `reason` is fixed text for the status line"""
+
+    def __init__(self, reason, explain):
+        super().__init__(explain)
+        self.reason = reason
+        self.explain = explain
 
 class StatsHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep-alive lets nginx reuse its pooled upstream connections
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+    # Headers and body go out in separate writes; without this, Nagle +
+    # delayed ACK stalls every keep-alive response by ~40ms
+    disable_nagle_algorithm = True
+
+    # --------------------------------------------
+    # Per-request metrics
+    # --------------------------------------------
+
+    def handle_one_request(self):
+        self.started_at = None
+        self.status = None
+        self.sent = 0
+        self.admitted = self.overloaded = False
+        try:
+            super().handle_one_request()
+        finally:
+            if self.admitted:
+                in_flight.leave()
+            if self.started_at is not None:
+                elapsed = time.perf_counter() - self.started_at
+                sent = 0 if self.command == 'HEAD' else self.sent
+                metrics.request_finished(metric_route(getattr(self, 'path', '')), self.status or 500, elapsed, sent)
+
+    def parse_request(self):
+        # The request line has arrived; idle keep-alive time isn't counted
+        self.started_at = time.perf_counter()
+        metrics.request_started()
+        return super().parse_request()
+
+    def send_header(self, keyword, value):
+        if keyword == 'Content-Length':
+            self.sent = int(value)
+        super().send_header(keyword, value)
+
+    def end_headers(self):
+        if (self.server.queued or not self.server.keep_alive) and not self.close_connection:
+            # Others are waiting for a worker (or there is only one); don't sit on this one idle
+            self.send_header('Connection', 'close')
+        super().end_headers()
+
+    def log_request(self, code='-', size='-'):
+        if isinstance(code, int):
+            self.status = code
+        if ACCESS_LOG:
+            super().log_request(code, size)
+
     def do_GET(self):
-        if self.path == '/api/stats':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Cache-Control', 'no-cache')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            
+        url = urlsplit(self.path)
+        route = url.path
+        self.query = parse_qs(url.query)
+        if not self.admit(route):
+            return
+        
+        if route == '/api/stats':
             # Combine calculated progress stats with incremental
-            stats = calculate_progress_stats()
-            stats.update(incremental_stats)
+            self.send_live("stats")
             
-            self.wfile.write(json.dumps(stats).encode())
+        elif route == '/api/stats/series':
+            self.send_series()
             
-        elif self.path.startswith('/api/workshop'):
-            # Detailed workshop stats
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Cache-Control', 'no-cache')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+        elif route == '/api/stats/history':
+            self.send_history()
             
-            stats = calculate_progress_stats()
-            phase = stats.get("phase", "production")
+        elif route == '/api/workshop':
+            self.send_live("workshop")
             
-            # Shift based on time of day
-            hour = datetime.now().hour
-            if hour < 6:
-                shift = "OVERNIGHT"
-            elif hour < 12:
-                shift = "MORNING"
-            elif hour < 18:
-                shift = "AFTERNOON"
-            else:
-                shift = "EVENING"
-            
-            # Sector rotation
-            sector = f"Sector {(hour % 7) + 1}"
+        elif route == '/api/santa/info':
+            self.send_live("santa")
             
-            # Workshop status messages
-            if phase == "delivering":
-                workshop_status = "SANTA IS FLYING!"
-                elf_morale = "CHEERING"
-            elif phase == "christmas_day":
-                workshop_status = "MERRY CHRISTMAS!"
-                elf_morale = "CELEBRATING"
-            elif phase == "final_prep":
-                workshop_status = "FINAL CHECKS"
-                elf_morale = "EXCITED"
-            elif phase == "post_christmas":
-                workshop_status = "VACATION MODE"
-                elf_morale = "RELAXED"
-            else:
-                # Regular production
-                progress = stats.get("progress", 0)
-                if progress > 90:
-                    workshop_status = "CRUNCH TIME"
-                    elf_morale = "FOCUSED"
-                elif progress > 70:
-                    workshop_status = "HIGH GEAR"
-                    elf_morale = "ENERGETIC"
-                elif progress > 50:
-                    workshop_status = "ON TRACK"
-                    elf_morale = "HAPPY"
-                else:
-                    workshop_status = "RAMPING UP"
-                    elf_morale = "CHEERFUL"
+        elif route == '/api/bundle':
+            self.send_bundle()
             
-            workshop_data = {
-                **stats,
-                "activeShift": shift,
-                "activeSector": sector,
-                "workshopStatus": workshop_status,
-                "wrappingPaperStatus": "LOW" if stats.get("progress", 0) > 95 else "OPTIMAL",
-                "elfMorale": elf_morale,
-                "productionRate": f"{100 + int(stats.get('progress', 0) / 10)}%" if phase == "production" else "N/A"
-            }
+        elif route == '/api/cctv/playlist':
+            self.send_snapshot(cctv_playlist.get())
             
-            self.wfile.write(json.dumps(workshop_data).encode())
+        elif route == '/api/stream':
+            self.start_stream()
             
-        elif self.path.startswith('/api/santa/info'):
-            # Santa tracking API (for logistics page)
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Cache-Control', 'no-cache')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+        elif route == '/api/metrics':
+            self.send_text(metrics.render(), METRICS_CONTENT_TYPE)
             
-            stats = calculate_progress_stats()
-            phase = stats.get("phase", "production")
+        elif route == '/api/metrics/profile':
+            self.send_profile()
             
-            if phase == "delivering":
-                # Santa is flying! Return real-ish tracking data
-                progress = stats.get("progress", 0) / 100
-                
-                # Simulate location based on flight progress
-                locations = [
-                    ("North Pole", "Arctic", 90.0, 0.0),
-                    ("Reykjavik", "Iceland", 64.1, -21.9),
-                    ("London", "United Kingdom", 51.5, -0.1),
-                    ("Paris", "France", 48.9, 2.4),
-                    ("Moscow", "Russia", 55.8, 37.6),
-                    ("Dubai", "UAE", 25.2, 55.3),
-                    ("Mumbai", "India", 19.1, 72.9),
-                    ("Beijing", "China", 39.9, 116.4),
-                    ("Tokyo", "Japan", 35.7, 139.7),
-                    ("Sydney", "Australia", -33.9, 151.2),
-                    ("Honolulu", "Hawaii", 21.3, -157.9),
-                    ("Los Angeles", "USA", 34.1, -118.2),
-                    ("New York", "USA", 40.7, -74.0),
-                    ("São Paulo", "Brazil", -23.5, -46.6),
-                    ("North Pole", "Home!", 90.0, 0.0),
-                ]
-                
-                idx = int(progress * (len(locations) - 1))
-                idx = min(idx, len(locations) - 2)
-                current = locations[idx]
-                next_loc = locations[idx + 1]
-                
-                santa_data = {
-                    "location": current[0],
-                    "country": current[1],
-                    "region": current[1],
-                    "lat": current[2],
-                    "lng": current[3],
-                    "next": {
-                        "city": next_loc[0],
-                        "region": next_loc[1],
-                        "arrival": (datetime.now() + timedelta(minutes=random.randint(5, 30))).isoformat()
-                    },
-                    "presentsDelivered": stats.get("presentsDelivered", 0),
-                    "distance": stats.get("distanceFlown", 0) * 1000,  # Convert to meters
-                    "status": "FLYING",
-                    "speed": f"{random.randint(5000, 8000)} km/h"
-                }
-            elif phase == "christmas_day":
-                santa_data = {
-                    "location": "North Pole",
-                    "country": "Home Sweet Home",
-                    "region": "Workshop",
-                    "presentsDelivered": stats.get("presentsDelivered", CHRISTMAS_TARGETS["presentsWrapped"]),
-                    "distance": 500_000_000_000,  # Full trip in meters
-                    "status": "MISSION COMPLETE",
-                    "next": None
-                }
+        else:
+            self.send_static()
+
+    def do_HEAD(self):
+        self.send_static(head_only=True)
+
+    # --------------------------------------------
+    # Admission control
+    # --------------------------------------------
+
+    def admit(self, route):
+        """Rate-limit API requests and note whether this process is overloaded"""
+        if not route.startswith('/api/') or route.startswith('/api/metrics'):
+            return True
+        client = client_key(self.client_address[0], self.headers.get('X-Real-IP'))
+        retry_after = rate_limits.take(client)
+        if retry_after:
+            self.send_retry(429, "Too many requests", retry_after)
+            return False
+        self.admitted = True
+        self.overloaded = in_flight.enter() or self.server.queued > 0
+        return True
+
+    def send_retry(self, code, message, seconds):
+        """429/503 with Retry-After, without computing anything"""
+        body = json.dumps({"error": message}).encode()
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Retry-After', str(max(1, math.ceil(seconds))))
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_cached(self, cache, name, variant=None, since=None):
+        """This tick's snapshot (or ?since= delta); when overloaded, the last one built"""
+        if not self.overloaded:
+            if since is None:
+                self.send_snapshot(cache.get(name, variant))
             else:
-                # Pre-flight - Santa at North Pole preparing
-                hours_until = stats.get("hoursUntilChristmas", 0)
-                santa_data = {
-                    "location": "North Pole",
-                    "country": "Workshop",
-                    "region": "Command Center",
-                    "presentsDelivered": 0,
-                    "distance": 0,
-                    "status": "PREPARING" if phase == "final_prep" else "AT WORKSHOP",
-                    "next": None,
-                    "message": f"Santa departs in approximately {hours_until} hours!" if hours_until > 0 else "Standby..."
-                }
-            
-            self.wfile.write(json.dumps(santa_data).encode())
-            
+                self.send_snapshot(cache.delta(name, since, variant))
+            return
+        snapshot = cache.peek(name, variant, since)
+        if snapshot is None:
+            self.send_retry(503, "Server busy", 1)
+        else:
+            self.send_snapshot(snapshot, stale_age=cache.age(snapshot))
+
+    def query_param(self, name, default=None):
+        return self.query.get(name, [default])[0]
+
+    def query_offset(self):
+        """The visitor's region from ?tz= or ?offset=, as bucketed minutes east of UTC"""
+        try:
+            return parse_offset(self.query_param('tz'), self.query_param('offset'), clock.now())
+        except ValueError as e:
+            # The status line is Latin-1 and must never carry query text
+            raise BadQuery("Bad time zone", str(e)) from None
+
+    def query_since(self):
+        """?since=<version> for a delta against a payload the client already has"""
+        since = self.query_param('since')
+        if since is None:
+            return None
+        if not (since.isascii() and since.isdigit()):
+            raise BadQuery("Bad since version", "since is the version of a payload you already have")
+        return int(since)
+
+    def query_at(self):
+        """?at=<ISO or epoch> as an epoch second, or None for now"""
+        at = self.query_param('at')
+        if not at:
+            return None
+        try:
+            when = parse_time(at, None)
+            # A day's margin keeps it in range at any UTC offset
+            if not datetime.min + timedelta(days=1) <= when <= datetime.max - timedelta(days=1):
+                raise ValueError(f"{when.isoformat()} is out of range")
+            return int(when.timestamp())
+        except (ValueError, OverflowError, OSError) as e:
+            raise BadQuery("Bad time", str(e)) from None
+
+    def send_live(self, name):
+        """The current snapshot, or with ?at=<ISO or epoch> the one for that moment.
+        ?tz= / ?offset= evaluate the timeline at the visitor's local time;
+        ?since=<version> returns only what changed (see snapshots.py)."""
+        try:
+            offset = self.query_offset()
+            since = self.query_since()
+            second = self.query_at()
+        except BadQuery as e:
+            self.send_error(400, e.reason, e.explain)
+            return
+        if second is None:
+            self.send_cached(snapshot_cache, name, offset, since)
+        elif self.overloaded:
+            self.send_retry(503, "Server busy", 1)
         else:
-            return http.server.SimpleHTTPRequestHandler.do_GET(self)
-
-print(f"🎄 Starting Santa's Workshop Server on port {PORT}...")
-print(f"📊 Stats API: http://localhost:{PORT}/api/stats")
-print(f"🛠️  Workshop API: http://localhost:{PORT}/api/workshop")  
-print(f"🎅 Santa Tracker API: http://localhost:{PORT}/api/santa/info")
-with socketserver.TCPServer(("", PORT), StatsHandler) as httpd:
-    httpd.serve_forever()
+            self.send_snapshot(get_snapshot_at(name, second, offset))
+
+    def send_bundle(self):
+        """?include=stats,workshop,santa &fields=progress,santa.location (+ ?at=, ?tz=, ?since=)"""
+        try:
+            include, fields = parse_bundle_query(self.query_param('include'), self.query_param('fields'))
+            offset = self.query_offset()
+            since = self.query_since()
+            second = self.query_at()
+        except BadQuery as e:
+            self.send_error(400, e.reason, e.explain)
+            return
+        except ValueError as e:
+            self.send_error(400, "Bad bundle query", str(e))
+            return
+        self.send_cached(bundle_cache, "bundle", (include, fields, offset, second), since)
+
+    def send_series(self):
+        """Season curve for charts: ?from=&to= (ISO or epoch) &step= (seconds)"""
+        try:
+            start = parse_time(self.query_param('from'), START_DATE)
+            end = parse_time(self.query_param('to'), POST_CHRISTMAS)
+            step = int(self.query_param('step', 3600))
+            if self.overloaded:
+                snapshot = series_cache.peek(start, end, step)
+            else:
+                snapshot = series_cache.get(start, end, step)
+        except (ValueError, OverflowError, OSError) as e:
+            self.send_error(400, "Bad series query", str(e))
+            return
+        if snapshot is None:
+            self.send_retry(503, "Server busy", 1)
+        else:
+            self.send_snapshot(snapshot)
+
+    def send_history(self):
+        """Served stats over ?window= seconds in ?resolution= second buckets (+ ?fields=)"""
+        try:
+            window = int(self.query_param('window', 3600))
+            resolution = int(self.query_param('resolution', 60))
+        except ValueError:
+            self.send_error(400, "Bad history query", "window and resolution are whole seconds")
+            return
+        fields = self.query_param('fields')
+        if fields is not None:
+            fields = tuple(sorted({name.strip() for name in fields.split(',')} - {''}))
+            unknown = [name for name in fields if name not in HISTORY_FIELDS]
+            if unknown:
+                # Never echo raw query text into the status line
+                self.send_error(400, "Bad history query",
+                                f"Unknown history fields: {', '.join(map(repr, unknown))}")
+                return
+        try:
+            self.send_cached(history_cache, "history", (window, resolution, fields))
+        except HistoryError as e:
+            self.send_error(400, "Bad history query", str(e))
+
+    def send_profile(self):
+        """Sample every thread for ?seconds= and report the hottest functions.
+        The token only comes in a header: URLs end up in access logs."""
+        token = self.headers.get('X-Profile-Token') or ''
+        if not PROFILE_TOKEN or not hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode()):
+            self.send_error(404, "File not found")  # Doesn't exist unless enabled
+            return
+        try:
+            seconds = float(self.query_param('seconds', 10))
+            top = int(self.query_param('top', 25))
+            report = sample_profile(seconds, top)
+        except ValueError as e:
+            self.send_error(400, "Bad profile query", str(e))
+            return
+        except ProfilerBusy as e:
+            self.send_error(409, str(e))
+            return
+        self.send_text(report, 'text/plain; charset=utf-8')
+
+    def send_text(self, body, content_type):
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_stream(self):
+        """Open an SSE stream and hand the socket over to the stream hub"""
+        if stream_hub.is_full():
+            self.send_error(503, "Too many live streams")
+            return
+        channels = parse_channels(self.query_param('channels'))
+        try:
+            offset = self.query_offset()
+        except BadQuery as e:
+            self.send_error(400, e.reason, e.explain)
+            return
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.send_header('X-Accel-Buffering', 'no')  # Tell nginx not to buffer
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(stream_hub.initial_events(channels, offset))
+        self.wfile.flush()
+        
+        # From here on the hub owns the socket; free this worker
+        self.close_connection = True
+        self.server.detach_request(self.connection)
+        stream_hub.subscribe(self.connection, channels, offset)
+
+    def send_static(self, head_only=False):
+        """Serve a file: zero-copy sendfile, byte ranges, precompressed .gz siblings"""
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, 'index.html')
+            if not urlsplit(self.path).path.endswith('/') or not os.path.isfile(index):
+                # Trailing-slash redirect or directory listing, as before
+                base = http.server.SimpleHTTPRequestHandler
+                return base.do_HEAD(self) if head_only else base.do_GET(self)
+            path = index
+        
+        if dashboard_pages.is_page(path):
+            try:
+                page = dashboard_pages.get(path)
+            except OSError:
+                self.send_error(404, "File not found")
+                return
+            self.send_snapshot(page, content_type='text/html; charset=utf-8', head_only=head_only)
+            return
+        
+        try:
+            entry = static_cache.lookup(path)
+        except OSError:
+            self.send_error(404, "File not found")
+            return
+        
+        # Ranges only apply to the identity encoding; If-Range drops a stale one
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if if_range and if_range != entry.etag:
+            range_header = None
+        
+        encoding = None
+        if range_header is None and accepts_gzip(self.headers.get('Accept-Encoding')):
+            try:
+                gzipped = static_cache.lookup(path + '.gz')
+            except OSError:
+                gzipped = None
+            if gzipped is not None and gzipped.mtime >= entry.mtime:
+                entry, encoding = gzipped, 'gzip'
+        
+        if entry.matches(self.headers.get('If-None-Match')):
+            self.send_response(304)
+            self.send_static_headers(path, entry, encoding)
+            self.end_headers()
+            return
+        
+        try:
+            byte_range = parse_range(range_header, entry.size)
+        except RangeNotSatisfiable as e:
+            self.send_response(416)
+            self.send_header('Content-Range', str(e))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        start, end = byte_range or (0, entry.size - 1)
+        length = end - start + 1
+        self.send_response(206 if byte_range else 200)
+        self.send_static_headers(path, entry, encoding)
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{entry.size}')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        if head_only or length <= 0:
+            return
+        
+        try:
+            if entry.body is not None:
+                self.wfile.write(memoryview(entry.body)[start:end + 1])
+            else:
+                with open(entry.path, 'rb') as f:
+                    self.connection.sendfile(f, start, length)
+        except (BrokenPipeError, ConnectionResetError):
+            # Players routinely abort a download when seeking
+            self.close_connection = True
+
+    def send_static_headers(self, path, entry, encoding):
+        self.send_header('Content-type', self.guess_type(path))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', entry.etag)
+        self.send_header('Last-Modified', self.date_time_string(int(entry.mtime)))
+        if HASHED_NAME.search(path):
+            self.send_header('Cache-Control', IMMUTABLE)
+        self.send_header('Vary', 'Accept-Encoding')
+
+    def send_snapshot(self, snapshot, stale_age=None, content_type='application/json', head_only=False):
+        """Send a cached payload, honouring If-None-Match and gzip.
+        A stale one (served while overloaded) says how old it is."""
+        use_gzip = snapshot.gzip_body is not None and accepts_gzip(self.headers.get('Accept-Encoding'))
+        etag = snapshot.gzip_etag if use_gzip else snapshot.etag
+        
+        if snapshot.matches(self.headers.get('If-None-Match')):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            return
+        
+        body = snapshot.gzip_body if use_gzip else snapshot.body
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        if stale_age is not None:
+            self.send_header('Age', str(stale_age))
+            self.send_header('X-Santa-Stale', '1')
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+
+class SantaHTTPServer(http.server.HTTPServer):
+    """HTTPServer that lets handlers hand their socket off (e.g. to the stream hub)"""
+    request_queue_size = LISTEN_BACKLOG
+    queued = 0      # Accepted connections waiting for a worker
+    keep_alive = True
+
+    def __init__(self, server_address, handler_class, reuse_port=False, listen_socket=None):
+        self.detached = set()
+        self.reuse_port = reuse_port
+        if listen_socket is None:
+            super().__init__(server_address, handler_class)
+            return
+        # Pre-fork fallback: serve a listening socket inherited from the parent
+        super().__init__(server_address, handler_class, bind_and_activate=False)
+        self.socket.close()
+        self.socket = listen_socket
+        self.server_address = listen_socket.getsockname()
+        self.server_name = socket.getfqdn(self.server_address[0])
+        self.server_port = self.server_address[1]
+
+    def server_bind(self):
+        if self.reuse_port:
+            # Every worker binds the same port; the kernel spreads connections
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+    def detach_request(self, request):
+        self.detached.add(request)
+
+    def shutdown_request(self, request):
+        if request in self.detached:
+            self.detached.discard(request)
+            return
+        super().shutdown_request(request)
+
+class SingleHTTPServer(SantaHTTPServer):
+    """One request at a time (the original behaviour)"""
+    keep_alive = False      # An idle client would hold up everyone else
+
+class PooledHTTPServer(SantaHTTPServer):
+    """Hands each connection to a bounded pool of worker threads"""
+
+    def __init__(self, server_address, handler_class, max_workers=WORKER_THREADS, **kwargs):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='santa-http')
+        self.queue_lock = threading.Lock()
+        super().__init__(server_address, handler_class, **kwargs)
+
+    def process_request(self, request, client_address):
+        with self.queue_lock:
+            self.queued += 1
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        with self.queue_lock:
+            self.queued -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class SantaApp:
+    """The HTTP server plus its background simulation, ready to embed"""
+
+    def __init__(self, httpd):
+        self.httpd = httpd
+        self.stop_event = threading.Event()
+        self.threads = []
+
+    @property
+    def server_address(self):
+        return self.httpd.server_address
+
+    def start_services(self, run_simulation=True):
+        targets = [stream_hub.run]
+        if run_simulation:
+            targets.append(simulation_loop)
+        for target in targets:
+            thread = threading.Thread(target=target, args=(self.stop_event,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def serve_forever(self, run_simulation=True):
+        self.start_services(run_simulation)
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.stop_event.set()
+            self.httpd.server_close()
+
+    def start(self):
+        """Serve from a background thread (for embedding and load tests)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return self
+
+    def shutdown(self):
+        self.stop_event.set()
+        self.httpd.shutdown()
+
+def create_app(host='', port=PORT, engine=ENGINE, threads=WORKER_THREADS, directory=None,
+               reuse_port=False, listen_socket=None):
+    """Build (but don't start) the stats server. port=0 picks a free port."""
+    if engine not in ('threaded', 'single'):
+        raise ValueError(f"Unknown engine {engine!r} (expected 'threaded' or 'single')")
+    handler = functools.partial(StatsHandler, directory=directory)
+    sockets = {'reuse_port': reuse_port, 'listen_socket': listen_socket}
+    if engine == 'threaded':
+        httpd = PooledHTTPServer((host, port), handler, max_workers=threads, **sockets)
+    else:
+        httpd = SingleHTTPServer((host, port), handler, **sockets)
+    return SantaApp(httpd)
+
+def serve_prefork(processes, host='', port=PORT):
+    """Fork `processes` HTTP workers; this process only runs the ticker.
+
+    Workers share the counters through `incremental_stats` (mapped before the
+    fork) and each binds the port with SO_REUSEPORT, or inherits one shared
+    listening socket where that isn't available. Dead workers are respawned.
+    """
+    if processes + 1 > metrics.slots:
+        raise ValueError(f"At most {metrics.slots - 1} worker processes are supported")
+    metrics.claim(processes)    # The ticker's timings; workers take 0..processes-1
+    get_route()  # Load once here so workers share it copy-on-write
+    shared_socket = None
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        shared_socket = socket.create_server((host, port), backlog=LISTEN_BACKLOG)
+
+    stop_event = threading.Event()
+    workers = {}    # pid -> metrics slot
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            metrics.claim(slot)
+            try:
+                app = create_app(host, port, reuse_port=shared_socket is None, listen_socket=shared_socket)
+                app.serve_forever(run_simulation=False)
+            finally:
+                os._exit(0)
+        workers[pid] = slot
+
+    exited = [False]    # Set by SIGCHLD; acted on between ticks
+
+    def child_exited(signum, frame):
+        # Forking here could interrupt the ticker holding a lock (e.g. the
+        # snapshot cache's mid-rebuild) that the child would inherit held
+        exited[0] = True
+
+    def reap():
+        if not exited[0]:
+            return
+        exited[0] = False
+        while workers:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = workers.pop(pid, None)
+            if slot is not None and not stop_event.is_set():
+                spawn(slot)  # The replacement carries on the dead worker's counters
+
+    def stop(signum, frame):
+        stop_event.set()
+
+    for slot in range(processes):
+        spawn(slot)
+    signal.signal(signal.SIGCHLD, child_exited)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # The ticker runs in the main thread and is the only thread here, so
+    # respawning from it between ticks forks with no lock held
+    try:
+        simulation_loop(stop_event, between_ticks=reap)
+    finally:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(workers):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+def main():
+    if PROCESSES > 1:
+        print(f"🎄 Starting Santa's Workshop Server on port {PORT} ({PROCESSES} {ENGINE} workers)...")
+        if clock.replaying:
+            print(f"⏩ Clock: {clock.describe()}")
+        serve_prefork(PROCESSES)
+        return
+
+    app = create_app()
+    port = app.server_address[1]
+    print(f"🎄 Starting Santa's Workshop Server on port {port} ({ENGINE} engine)...")
+    if clock.replaying:
+        print(f"⏩ Clock: {clock.describe()}")
+    print(f"📊 Stats API: http://localhost:{port}/api/stats")
+    print(f"🛠️  Workshop API: http://localhost:{port}/api/workshop")
+    print(f"🎅 Santa Tracker API: http://localhost:{port}/api/santa/info")
+    print(f"📡 Live Stream: http://localhost:{port}/api/stream")
+    print(f"📈 Metrics: http://localhost:{port}/api/metrics")
+    try:
+        app.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
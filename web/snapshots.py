@@ -0,0 +1,201 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+
+# ============================================
+# PER-TICK SNAPSHOT CACHE
+# ============================================
+# The stats only move once per second, so every API payload is computed at
+# most once per tick and kept as ready-to-send bytes (plain + gzip) with a
+# strong ETag. Serving a poll is then a dict lookup and a socket write.
+
+TICK_SECONDS = 1
+GZIP_MIN_BYTES = 256    # Tiny bodies aren't worth the gzip framing
+
+# Delta sync: a snapshot's tick is its version. A client that sends
+# ?since=<version> gets only what changed since then:
+#   {"version": 1734, "since": 1732, "patch": {...}, "removed": [["santa", "next"]]}
+# where nested objects in "patch" are merged key by key. If `since` is older
+# than the last DELTA_HISTORY versions (or unknown), or the delta would be
+# bigger than the payload, it gets {"version": ..., "full": true, "data": ...}.
+DELTA_HISTORY = 30
+_FULL = object()        # Key of the shared full resync in a tick's deltas
+
+
+def accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip. An explicit gzip entry
+    overrides "*"; q=0 (or a weight that doesn't parse) refuses.
+
+    >>> accepts_gzip("gzip, deflate, br")
+    True
+    >>> accepts_gzip("*;q=0, gzip")
+    True
+    >>> accepts_gzip("gzip;q=0, *")
+    False
+    >>> accepts_gzip("br, *;q=0.5")
+    True
+    >>> accepts_gzip("gzip;q=oops")
+    False
+    """
+    if not accept_encoding:
+        return False
+    weights = {}    # "gzip" / "*" -> q
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0     # Unparseable weight: don't risk it
+        weights[coding] = q
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+
+class Snapshot:
+    """One encoded payload, valid for a single tick (JSON unless `body` is given)"""
+
+    __slots__ = ("tick", "data", "body", "gzip_body", "etag", "gzip_etag")
+
+    def __init__(self, tick, data, body=None):
+        self.tick = tick
+        self.data = data
+        self.body = json.dumps(data, separators=(",", ":")).encode() if body is None else body
+
+        digest = hashlib.blake2b(self.body, digest_size=8).hexdigest()
+        self.etag = f'"{digest}"'
+
+        # Strong ETags must differ per representation
+        if len(self.body) >= GZIP_MIN_BYTES:
+            self.gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+            self.gzip_etag = f'"{digest}-gz"'
+        else:
+            self.gzip_body = None
+            self.gzip_etag = None
+
+    def matches(self, if_none_match):
+        """Check an If-None-Match header against either representation"""
+        if not if_none_match:
+            return False
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == "*" or tag == self.etag or tag == self.gzip_etag:
+                return True
+        return False
+
+
+def diff(old, new, path=()):
+    """(patch, removed paths) that turn dict `old` into dict `new`"""
+    patch, removed = {}, []
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                sub_patch, sub_removed = diff(old[key], value, path + (key,))
+                if sub_patch:
+                    patch[key] = sub_patch
+                removed += sub_removed
+            else:
+                patch[key] = value
+    removed += [list(path + (key,)) for key in old if key not in new]
+    return patch, removed
+
+
+class SnapshotCache:
+    """Builds each named payload once per tick and shares it between requests"""
+
+    def __init__(self, builders, tick_seconds=TICK_SECONDS, clock=time.time, max_entries=None):
+        self.builders = builders
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self.max_entries = max_entries  # Bounds open-ended variants (oldest rebuilt go first)
+        self._entries = {}
+        self._history = {}      # key -> recent snapshots, oldest first
+        self._deltas = {}       # key -> (tick, {since: delta snapshot})
+        # Re-entrant so a builder may pull another snapshot it depends on
+        self._lock = threading.RLock()
+
+    def current_tick(self):
+        return int(self.clock() // self.tick_seconds)
+
+    def get(self, name, variant=None):
+        """This tick's payload; a variant (e.g. a UTC offset) is passed to the builder"""
+        key = (name, variant)
+        tick = self.current_tick()
+        snapshot = self._entries.get(key)
+        if snapshot is not None and snapshot.tick == tick:
+            return snapshot
+
+        # Only one thread rebuilds; everyone else waits for its result
+        with self._lock:
+            snapshot = self._entries.get(key)
+            if snapshot is None or snapshot.tick != tick:
+                builder = self.builders[name]
+                snapshot = Snapshot(tick, builder() if variant is None else builder(variant))
+                self._entries.pop(key, None)
+                self._entries[key] = snapshot
+                self._history.setdefault(key, deque(maxlen=DELTA_HISTORY)).append(snapshot)
+                if self.max_entries is not None and len(self._entries) > self.max_entries:
+                    oldest = next(iter(self._entries))
+                    del self._entries[oldest]
+                    self._history.pop(oldest, None)
+                    self._deltas.pop(oldest, None)
+        return snapshot
+
+    def peek(self, name, variant=None, since=None):
+        """The last snapshot (or ?since= delta) built for a key, however old; never builds.
+
+        Doesn't take the lock, so it can't queue behind a rebuild.
+        """
+        key = (name, variant)
+        if since is None:
+            return self._entries.get(key)
+        by_since = self._deltas.get(key, (None, {}))[1]
+        return by_since.get(since) or by_since.get(_FULL)
+
+    def age(self, snapshot):
+        """Seconds since `snapshot`'s tick"""
+        return max(0, self.current_tick() - snapshot.tick) * self.tick_seconds
+
+    def delta(self, name, since, variant=None):
+        """What changed in this tick's payload since version `since`, as a snapshot.
+
+        Each version still in the ring is diffed once per tick, however many
+        clients ask. Any other `since` shares the tick's one full resync
+        snapshot, so a key never holds more than DELTA_HISTORY + 1 of them.
+        """
+        key = (name, variant)
+        current = self.get(name, variant)
+        with self._lock:
+            tick, by_since = self._deltas.get(key, (None, None))
+            if tick != current.tick:
+                by_since = {}
+                self._deltas[key] = (current.tick, by_since)
+            snapshot = by_since.get(since)
+            if snapshot is not None:
+                return snapshot
+            base = next((s for s in self._history.get(key, ()) if s.tick == since), None)
+            if base is not None:
+                patch, removed = diff(base.data, current.data)
+                document = {"version": current.tick, "since": since, "patch": patch, "removed": removed}
+                if len(json.dumps(document, separators=(",", ":"))) < len(current.body):
+                    snapshot = by_since[since] = Snapshot(current.tick, document)
+                    return snapshot
+            snapshot = by_since.get(_FULL)
+            if snapshot is None:
+                snapshot = by_since[_FULL] = Snapshot(
+                    current.tick, {"version": current.tick, "full": True, "data": current.data})
+            if base is not None:
+                by_since[since] = snapshot      # Diff no smaller than the payload
+        return snapshot
@@ -0,0 +1,115 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# ============================================
+# STATIC FILES (when there's no nginx in front)
+# ============================================
+# SimpleHTTPRequestHandler copies every file through Python buffers and
+# ignores Range, so a <video> seek re-downloads the whole clip. This serves
+# files with socket.sendfile() (os.sendfile underneath: the kernel copies
+# straight from the page cache to the socket), answers single byte ranges
+# with 206, and keeps small hot files in a bounded in-memory LRU.
+#
+# Cached entries are keyed by path and checked against the file's mtime and
+# size on every request (one stat), so edited files are picked up at once.
+
+CACHE_MAX_BYTES = int(os.environ.get('SANTA_STATIC_CACHE_MB', 32)) * 1024 * 1024
+CACHE_MAX_FILE = 256 * 1024     # Larger files always go through sendfile
+
+# Names written by build_static.py (name.<10 hex digits>.ext) never change
+HASHED_NAME = re.compile(r"\.[0-9a-f]{10}\.\w+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class RangeNotSatisfiable(ValueError):
+    """A Range header that selects no bytes of the file"""
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single-range header, or None for the whole file.
+
+    Multiple ranges and malformed headers are ignored (a full 200 is always
+    a valid answer); a range wholly past the end raises RangeNotSatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            start, end = max(0, size - int(last)), size - 1     # Suffix: last N bytes
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(f"bytes */{size}")
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+class StaticFile:
+    """What a response needs to know about one file on disk"""
+
+    __slots__ = ("path", "size", "mtime", "etag", "body")
+
+    def __init__(self, path, stat, body=None):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.body = body    # Bytes when cached, else None (send from disk)
+
+    def matches(self, if_none_match):
+        if not if_none_match:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags
+
+
+class StaticCache:
+    """LRU of small files' bytes, bounded by total size"""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, max_file=CACHE_MAX_FILE):
+        self.max_bytes = max_bytes
+        self.max_file = max_file
+        self.entries = OrderedDict()    # path -> StaticFile with a body
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def lookup(self, path):
+        """StaticFile for `path` (raises OSError if it's missing)"""
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None:
+                if entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+                    self.entries.move_to_end(path)
+                    return entry
+                self._evict(path)
+
+        if stat.st_size > self.max_file or self.max_bytes <= 0:
+            return StaticFile(path, stat)
+
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            body = f.read()
+        entry = StaticFile(path, stat, body)
+        if len(body) != entry.size:
+            return StaticFile(path, stat)   # Changed while reading; don't cache it
+        with self.lock:
+            if path in self.entries:
+                self._evict(path)
+            self.entries[path] = entry
+            self.total += entry.size
+            while self.total > self.max_bytes:
+                self._evict(next(iter(self.entries)))
+        return entry
+
+    def _evict(self, path):
+        self.total -= self.entries.pop(path).size
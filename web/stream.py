@@ -0,0 +1,187 @@
+import queue
+import resource
+import selectors
+import time
+
+# ============================================
+# SERVER-SENT EVENTS PUSH STREAM
+# ============================================
+# Instead of every browser polling once a second, subscribers hold one idle
+# connection to /api/stream. A single hub thread owns all of those sockets
+# (non-blocking, watched by one selector) and pushes each tick's snapshot to
+# everyone, so an idle subscriber costs a file descriptor and a small object
+# rather than a worker thread.
+# Subscribers in different time zones (?tz= / ?offset=) get the snapshots
+# for their offset; each offset in use is encoded once per tick.
+
+CHANNELS = ("stats", "workshop", "santa")
+MAX_SUBSCRIBERS = 50_000
+RETRY_MS = 3000             # Browser reconnect delay after a drop
+PING_INTERVAL = 15          # Keep proxies from timing out quiet streams
+MAX_STALLED_TICKS = 30      # Drop clients that can't drain a single event
+
+
+def parse_channels(value):
+    """'stats,santa' -> ('stats', 'santa'); unknown names are ignored"""
+    if not value:
+        return CHANNELS
+    wanted = {name.strip() for name in value.split(",")}
+    return tuple(name for name in CHANNELS if name in wanted) or CHANNELS
+
+
+def format_event(channel, snapshot):
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (snapshot.tick, channel.encode(), snapshot.body)
+
+
+def raise_fd_limit():
+    """Lift the soft open-file limit to the hard limit for many idle streams"""
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ValueError, OSError):
+        pass
+
+
+class Subscriber:
+    __slots__ = ("sock", "channels", "offset", "pending", "stalled", "last_write")
+
+    def __init__(self, sock, channels, offset=None):
+        self.sock = sock
+        self.channels = channels
+        self.offset = offset
+        self.pending = b""
+        self.stalled = 0
+        self.last_write = time.time()
+
+
+class StreamHub:
+    """Owns every open stream and broadcasts one update per tick"""
+
+    def __init__(self, snapshot_cache, tick_seconds=1):
+        self.snapshot_cache = snapshot_cache
+        self.tick_seconds = tick_seconds
+        self.selector = None    # Made in run(): an epoll made before a fork would be shared
+        self.incoming = queue.SimpleQueue()
+        self.subscribers = {}
+        self.last_etags = {}
+
+    def __len__(self):
+        return len(self.subscribers) + self.incoming.qsize()
+
+    def is_full(self):
+        return len(self) >= MAX_SUBSCRIBERS
+
+    def initial_events(self, channels, offset=None):
+        """Current state for a brand new subscriber"""
+        events = [b"retry: %d\n\n" % RETRY_MS]
+        for channel in channels:
+            events.append(format_event(channel, self.snapshot_cache.get(channel, offset)))
+        return b"".join(events)
+
+    def subscribe(self, sock, channels, offset=None):
+        """Take ownership of a socket whose headers have already been sent"""
+        self.incoming.put(Subscriber(sock, channels, offset))
+
+    def run(self, stop_event):
+        raise_fd_limit()
+        self.selector = selectors.DefaultSelector()
+        next_tick = (int(time.time() // self.tick_seconds) + 1) * self.tick_seconds
+        while not stop_event.is_set():
+            timeout = max(0.0, next_tick - time.time())
+            for key, _ in self.selector.select(timeout):
+                self._on_readable(key.data)
+            self._accept_new()
+
+            now = time.time()
+            if now >= next_tick:
+                self._broadcast(now)
+                # Skip ticks we were too slow for rather than bursting
+                next_tick = (int(now // self.tick_seconds) + 1) * self.tick_seconds
+
+        for sub in list(self.subscribers.values()):
+            self._drop(sub)
+        self.selector.close()
+
+    def _accept_new(self):
+        while True:
+            try:
+                sub = self.incoming.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                sub.sock.setblocking(False)
+                self.selector.register(sub.sock, selectors.EVENT_READ, sub)
+            except (OSError, ValueError):
+                sub.sock.close()
+                continue
+            self.subscribers[sub.sock.fileno()] = sub
+
+    def _on_readable(self, sub):
+        # Clients never send anything after the request, so this is EOF
+        try:
+            data = sub.sock.recv(1024)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(sub)
+
+    def _drop(self, sub):
+        self.subscribers.pop(sub.sock.fileno(), None)
+        try:
+            self.selector.unregister(sub.sock)
+        except (KeyError, ValueError):
+            pass
+        sub.sock.close()
+
+    def _changed(self, offset):
+        """Encoded events for the channels whose snapshot changed this tick"""
+        changed = {}
+        for channel in CHANNELS:
+            snapshot = self.snapshot_cache.get(channel, offset)
+            if self.last_etags.get((channel, offset)) != snapshot.etag:
+                self.last_etags[(channel, offset)] = snapshot.etag
+                changed[channel] = format_event(channel, snapshot)
+        return changed
+
+    def _broadcast(self, now):
+        # Encode each changed channel once per offset, for everybody there
+        changed = {}
+        payloads = {}
+        for sub in list(self.subscribers.values()):
+            if sub.pending:
+                # Still draining an older event; it gets the next one instead
+                self._send(sub, sub.pending, now)
+                continue
+            if sub.offset not in changed:
+                changed[sub.offset] = self._changed(sub.offset)
+            key = (sub.channels, sub.offset)
+            payload = payloads.get(key)
+            if payload is None:
+                events = changed[sub.offset]
+                payload = b"".join(events[c] for c in sub.channels if c in events)
+                payloads[key] = payload
+            if payload:
+                self._send(sub, payload, now)
+            elif now - sub.last_write >= PING_INTERVAL:
+                self._send(sub, b": ping\n\n", now)
+
+    def _send(self, sub, data, now):
+        try:
+            sent = sub.sock.send(data)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._drop(sub)
+            return
+
+        sub.last_write = now
+        sub.pending = data[sent:]
+        if not sub.pending:
+            sub.stalled = 0
+            return
+        sub.stalled += 1
+        if sub.stalled > MAX_STALLED_TICKS:
+            self._drop(sub)